@@ -6,35 +6,57 @@ discover potential corporate sponsors in Kazakhstan. This assistant integrates w
 the database to provide company information and maintains conversation history.
 """
 
+import asyncio
+import hashlib
 import json
+import logging
+import orjson
+import threading
 import time
-from typing import Dict, List, Optional, Any
-from openai import OpenAI
+import unicodedata
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple, Union
+from openai import APITimeoutError
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 
 from ..core.config import get_settings
+from ..core.database import SessionLocal
 from ..companies.service import CompanyService
 from .models import ChatResponse, CompanyData
+from .company_fields import COMPANY_OUTPUT_KEYS, COMPANY_SOURCE_KEYS
+from .openai_client import get_openai_client, model_name
+from .semantic_cache import SemanticCache, question_scope
 from ..auth.models import User
 from ..chats import models
 from ..chats import service as chat_service
 import uuid
 
+logger = logging.getLogger(__name__)
 
-class CharityFundAssistant:
-    """
-    Assistant specifically designed for charity fund discovery use case.
-    Manages conversation history and integrates with company database.
-    """
-    
-    def __init__(self):
-        self.settings = get_settings()
-        self.client = OpenAI(
-            api_key=self.settings.OPENAI_API_KEY,
-        )
-        
-        # Assistant configuration for charity fund discovery
-        self.system_instructions = """
+# Settings are fixed for the life of the process (get_settings is lru_cached)
+_SETTINGS = get_settings()
+
+# Answers to the opening question of a chat, reused by new chats that open with a
+# near-identical question (see semantic_cache.py)
+_SEMANTIC_CACHE = SemanticCache(
+    threshold=_SETTINGS.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=_SETTINGS.SEMANTIC_CACHE_TTL_SECONDS,
+)
+
+
+# Assistant IDs keyed by a hash of the model, instructions and tools schema. The
+# assistant configuration is static, so one assistant can serve every conversation.
+_ASSISTANT_ID_CACHE: Dict[str, str] = {}
+_ASSISTANT_ID_LOCK = asyncio.Lock()
+
+
+# Assistant configuration for charity fund discovery. A module constant so the
+# ~2KB prompt is built once and stays byte-identical between assistants and runs,
+# which keeps OpenAI's prompt caching effective. Runs must not override it with a
+# dynamic `instructions=` value (that replaces, not extends, the system prompt).
+SYSTEM_INSTRUCTIONS = """
         You are an AI assistant for the Ayala Foundation project, specifically designed to help charity funds discover potential corporate sponsors in Kazakhstan.
 
         Your primary capabilities:
@@ -68,345 +90,1156 @@ class CharityFundAssistant:
         - Financial indicators and tax compliance data
         """
 
-    def create_assistant(self) -> str:
-        """
-        Create a new OpenAI assistant configured for charity fund discovery.
-        Returns the assistant ID.
-        """
-        try:
-            assistant = self.client.beta.assistants.create(
-                model=self.settings.OPENAI_MODEL_NAME,
-                name="Charity Fund Discovery Assistant",
-                instructions=self.system_instructions,
-                tools=[
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "search_companies",
-                            "description": "Search for companies in Kazakhstan based on location, industry, or other criteria",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "location": {
-                                        "type": "string",
-                                        "description": "City or region to search in (e.g., 'Алматы', 'Астана')"
-                                    },
-                                    "activity_keywords": {
-                                        "type": "array",
-                                        "items": {"type": "string"},
-                                        "description": "Keywords related to company activities or industries"
-                                    },
-                                    "limit": {
-                                        "type": "integer",
-                                        "description": "Maximum number of companies to return (defaults to 50 if not specified)",
-                                        "default": 10
-                                    },
-                                    "page": {
-                                        "type": "integer",
-                                        "description": "Page number for pagination (1-based). Use 1 for first page, 2 for second page, etc.",
-                                        "default": 1
-                                    },
-
-                                },
-                                "required": []
-                            }
-                        }
+
+# Function tools exposed to the assistant. Built once at import time and reused for
+# every create_assistant call and for the assistant cache key.
+_TOOLS_SCHEMA: List[Dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_companies",
+            "description": "Search for companies in Kazakhstan based on location, industry, or other criteria",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "description": "City or region to search in (e.g., 'Алматы', 'Астана')"
+                    },
+                    "activity_keywords": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Keywords related to company activities or industries"
                     },
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "get_company_details",
-                            "description": "Get detailed information about a specific company",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "company_id": {
-                                        "type": "string",
-                                        "description": "The unique ID of the company"
-                                    }
-                                },
-                                "required": ["company_id"]
-                            }
-                        }
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of companies to return (defaults to 50 if not specified)",
+                        "default": 10
+                    },
+                    "page": {
+                        "type": "integer",
+                        "description": "Page number for pagination (1-based). Use 1 for first page, 2 for second page, etc.",
+                        "default": 1
+                    },
+
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_company_details",
+            "description": "Get detailed information about a specific company",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "company_id": {
+                        "type": "string",
+                        "description": "The unique ID of the company"
                     }
-                ]
-            )
-            
-            print(f"✅ Created assistant: {assistant.id}")
-            return assistant.id
-            
+                },
+                "required": ["company_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_company_details_bulk",
+            "description": "Get detailed information about several companies at once. Prefer this over multiple get_company_details calls",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "company_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "The unique IDs of the companies"
+                    }
+                },
+                "required": ["company_ids"]
+            }
+        }
+    }
+]
+_TOOLS_SCHEMA_JSON = json.dumps(_TOOLS_SCHEMA, sort_keys=True)
+
+
+# Access mode and resource of each tool, used to decide which calls of one step may
+# run concurrently: reads of a resource overlap, a write is serialized with every
+# other call touching the same resource. Tools missing here are treated as writes.
+TOOL_DEPENDS: Dict[str, Tuple[str, str]] = {
+    "search_companies": ("read", "companies"),
+    "get_company_details": ("read", "companies"),
+    "get_company_details_bulk": ("read", "companies"),
+}
+
+
+# Cache of search_companies results keyed by the normalized search parameters.
+# Follow-up questions make the assistant repeat searches, and different users ask
+# for the same popular searches; the company registry itself changes rarely.
+_SEARCH_CACHE_TTL_SECONDS = 24 * 60 * 60
+_SEARCH_CACHE_MAX_ENTRIES = 1024
+# Rows are kept as tuples in COMPANY_OUTPUT_FIELDS order: a long-lived cache of
+# dicts would pay for a 14-key hash table per company
+_SEARCH_CACHE: "OrderedDict[bytes, Tuple[float, List[Tuple[Any, ...]]]]" = OrderedDict()
+_SEARCH_CACHE_LOCK = threading.Lock()
+_SEARCH_CACHE_STATS = {"hits": 0, "misses": 0}
+
+# (assistant_id, thread_id) pairs of existing chats confirmed to still exist on
+# OpenAI's side, with the time the check expires. Saves re-checking on every message.
+_VALIDATED_OPENAI_IDS_TTL_SECONDS = 600
+_VALIDATED_OPENAI_IDS_MAX_ENTRIES = 10_000
+_VALIDATED_OPENAI_IDS: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+_VALIDATED_OPENAI_IDS_LOCK = threading.Lock()
+
+# Empty threads created ahead of time, so a new chat doesn't wait for threads.create.
+# Refilled in the background once it drops to half its size. Per process and off by
+# default (size 0); threads still pooled at shutdown are deleted.
+WARM_THREAD_POOL_SIZE = _SETTINGS.WARM_THREAD_POOL_SIZE
+WARM_THREAD_POOL_LOW_WATER = WARM_THREAD_POOL_SIZE // 2
+_WARM_THREADS: "deque[str]" = deque()
+_WARM_THREADS_REFILL: Optional["asyncio.Task[None]"] = None
+
+# Messages returned with a continued conversation; long chats have hundreds
+CONVERSATION_HISTORY_LIMIT = 50
+
+# How many of the latest stored chat messages are copied verbatim into a thread that
+# has to be recreated; older turns are summarized into one message.
+THREAD_SEED_RECENT_MESSAGES = 20
+
+# Keyset cursors for the next page of a search, keyed like the search cache (with the
+# next page's offset): the last row of a page read from the database. Lets "more"
+# requests continue after that row instead of using OFFSET. A cursor expires with the
+# cached page it was taken from, so it never points past rows older than that page.
+_PAGE_CURSOR_MAX_ENTRIES = 1024
+_PAGE_CURSORS: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Marks metadata values that were stored as JSON (OpenAI metadata values are
+# strings), so reading the history only parses those instead of trying every value
+_JSON_METADATA_PREFIX = "__j:"
+
+# Set once the session's engine has been checked for connection pooling
+_POOL_CHECKED = False
+
+
+def _openai_ids_validated(assistant_id: str, thread_id: str) -> bool:
+    """Whether the assistant and thread were confirmed to exist within the TTL."""
+    with _VALIDATED_OPENAI_IDS_LOCK:
+        expires_at = _VALIDATED_OPENAI_IDS.get((assistant_id, thread_id))
+        return expires_at is not None and expires_at > time.monotonic()
+
+
+def _set_openai_ids_validated(assistant_id: str, thread_id: str, valid: bool = True) -> None:
+    """Records (or, with valid=False, forgets) a successful existence check."""
+    key = (assistant_id, thread_id)
+    with _VALIDATED_OPENAI_IDS_LOCK:
+        if not valid:
+            _VALIDATED_OPENAI_IDS.pop(key, None)
+            return
+        _VALIDATED_OPENAI_IDS[key] = time.monotonic() + _VALIDATED_OPENAI_IDS_TTL_SECONDS
+        _VALIDATED_OPENAI_IDS.move_to_end(key)
+        while len(_VALIDATED_OPENAI_IDS) > _VALIDATED_OPENAI_IDS_MAX_ENTRIES:
+            _VALIDATED_OPENAI_IDS.popitem(last=False)
+
+
+# Assistant replies still being written to the database, by chat. The event loop only
+# keeps weak references to tasks, so they are held here until done. A reply is
+# returned before its write commits, so anything that reads or adds to a chat's
+# messages first waits for that chat's writes (wait_for_chat_message_writes). Keyed
+# by the chat ID as a string, since requests pass it as one.
+_PENDING_MESSAGE_WRITES: "Dict[str, set]" = {}
+
+
+def _save_message_in_background(chat_id: uuid.UUID, content: str, role: str, metadata: Dict[str, Any]) -> None:
+    """
+    Stores a chat message without making the caller wait for the commit. The write
+    uses its own session, since the request's session is closed when it returns.
+    """
+    def _write() -> None:
+        db = SessionLocal()
+        try:
+            chat_service.create_message(db, chat_id=chat_id, content=content, role=role, metadata=metadata)
         except Exception as e:
-            print(f"❌ Error creating assistant: {str(e)}")
-            raise
+            logger.error("Error saving %s message for chat %s: %s", role, chat_id, e)
+        finally:
+            db.close()
+
+    def _done(task: asyncio.Task) -> None:
+        pending = _PENDING_MESSAGE_WRITES.get(str(chat_id))
+        if pending is not None:
+            pending.discard(task)
+            if not pending:
+                del _PENDING_MESSAGE_WRITES[str(chat_id)]
+
+    task = asyncio.get_running_loop().create_task(asyncio.to_thread(_write))
+    _PENDING_MESSAGE_WRITES.setdefault(str(chat_id), set()).add(task)
+    task.add_done_callback(_done)
+
+
+async def wait_for_chat_message_writes(chat_id: Union[uuid.UUID, str]) -> None:
+    """Waits until the background message writes of one chat are committed."""
+    pending = _PENDING_MESSAGE_WRITES.get(str(chat_id))
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def wait_for_pending_message_writes() -> None:
+    """Waits for the background message writes still running (on app shutdown)."""
+    pending = [task for tasks in _PENDING_MESSAGE_WRITES.values() for task in tasks]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _forget_assistant_id(assistant_id: str) -> None:
+    """Drops an assistant ID from the cache, e.g. after it was deleted on OpenAI's side."""
+    for key, cached_id in list(_ASSISTANT_ID_CACHE.items()):
+        if cached_id == assistant_id:
+            del _ASSISTANT_ID_CACHE[key]
+
+
+def _format_company_details(company_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Shapes a CompanyService company into the get_company_details tool output."""
+    return {
+        "id": company_dict.get("id"),
+        "name": company_dict.get("name"),
+        "bin": company_dict.get("bin"),
+        "registration_date": company_dict.get("registration_date"),
+        "address": company_dict.get("address"),
+        "activity": company_dict.get("activity"),
+        "ceo_name": company_dict.get("ceo_name"),
+        "locality": company_dict.get("locality"),
+        "tax_payments": company_dict.get("tax_payments", []),
+        "founders": company_dict.get("founder_names", [])
+    }
+
+
+async def delete_warm_threads() -> None:
+    """
+    Deletes the threads still waiting in the warm pool (on app shutdown), so they are
+    not left behind on OpenAI's side by every restart.
+    """
+    global _WARM_THREADS_REFILL
+    refill, _WARM_THREADS_REFILL = _WARM_THREADS_REFILL, None
+    if refill is not None and not refill.done():
+        refill.cancel()
+        await asyncio.gather(refill, return_exceptions=True)
+    if not _WARM_THREADS:
+        return
+
+    # Pooled threads were created through the shared client, so it exists already
+    client = get_openai_client()
+    thread_ids = list(_WARM_THREADS)
+    _WARM_THREADS.clear()
+    results = await asyncio.gather(
+        *(client.beta.threads.delete(thread_id) for thread_id in thread_ids),
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        logger.warning("Could not delete %d of %d warm threads: %s", len(errors), len(thread_ids), errors[0])
+
+
+def _normalize_search_text(value: str) -> str:
+    # The filters match case-insensitively (ILIKE / full-text search), so case and
+    # surrounding whitespace don't change the result
+    return unicodedata.normalize("NFKC", value).strip().lower()
+
+
+def _search_cache_key(search_params: Dict[str, Any]) -> bytes:
+    """
+    Builds the search cache key. Text filters are normalized (NFKC, case, whitespace);
+    activity keywords are OR-ed in the query, so their order and duplicates don't
+    change the result either and are normalized away.
+    """
+    key_params = dict(search_params)
+    for field in ("location", "company_name"):
+        if isinstance(key_params.get(field), str):
+            key_params[field] = _normalize_search_text(key_params[field])
+    keywords = key_params.get("activity_keywords")
+    if isinstance(keywords, list) and all(isinstance(keyword, str) for keyword in keywords):
+        key_params["activity_keywords"] = sorted({_normalize_search_text(keyword) for keyword in keywords})
+    return orjson.dumps(key_params, option=orjson.OPT_SORT_KEYS)
+
+
+def _company_row(company_dict: Dict[str, Any]) -> Tuple[Any, ...]:
+    """The fields of a CompanyService row as a tuple in COMPANY_OUTPUT_FIELDS order."""
+    return tuple(company_dict.get(source_key) for source_key in COMPANY_SOURCE_KEYS)
+
+
+def _get_cached_search(cache_key: bytes) -> Optional[List[Tuple[Any, ...]]]:
+    """Returns the cached company rows for a search, or None if missing or expired."""
+    with _SEARCH_CACHE_LOCK:
+        entry = _SEARCH_CACHE.get(cache_key)
+        if entry is not None and entry[0] > time.monotonic():
+            _SEARCH_CACHE_STATS["hits"] += 1
+            return entry[1]
+        if entry is not None:
+            del _SEARCH_CACHE[cache_key]
+        _SEARCH_CACHE_STATS["misses"] += 1
+        return None
+
+
+def _store_cached_search(cache_key: bytes, rows: List[Tuple[Any, ...]]) -> None:
+    """Caches search results, evicting the oldest entries beyond the size limit."""
+    with _SEARCH_CACHE_LOCK:
+        _SEARCH_CACHE[cache_key] = (time.monotonic() + _SEARCH_CACHE_TTL_SECONDS, rows)
+        _SEARCH_CACHE.move_to_end(cache_key)
+        while len(_SEARCH_CACHE) > _SEARCH_CACHE_MAX_ENTRIES:
+            _SEARCH_CACHE.popitem(last=False)
+
+
+def _message_fingerprint(role: Optional[str], content: Optional[str]) -> Tuple[Optional[str], bytes]:
+    """Identifies a message by its role and a 128-bit digest of its content."""
+    return role, hashlib.blake2b((content or "").encode("utf-8"), digest_size=16).digest()
+
+
+def _build_thread_seed(
+    history: List[Any],
+    keep_last: int = THREAD_SEED_RECENT_MESSAGES
+) -> List[Dict[str, str]]:
+    """
+    Builds the initial messages for a thread that replaces a lost one, from the chat's
+    stored messages. Only the last `keep_last` messages are copied as-is; earlier user
+    requests are condensed into a single "Previous context" message.
+    """
+    messages = sorted(
+        (msg for msg in history if msg.content),
+        key=lambda msg: msg.created_at
+    )
+    older, recent = messages[:-keep_last], messages[-keep_last:]
+
+    seed: List[Dict[str, str]] = []
+    if older:
+        user_requests = [msg.content[:100] for msg in older if msg.role == "user"]
+        if user_requests:
+            seed.append({
+                "role": "user",
+                "content": "Previous context: earlier in this conversation the user asked about: "
+                           + "; ".join(user_requests)
+            })
+    seed.extend({"role": msg.role, "content": msg.content} for msg in recent)
+    return seed
+
+
+def _get_page_cursor(cache_key: bytes) -> Optional[Dict[str, Any]]:
+    """Returns the keyset cursor for a search page, if its previous page was read recently."""
+    with _SEARCH_CACHE_LOCK:
+        entry = _PAGE_CURSORS.get(cache_key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _PAGE_CURSORS[cache_key]
+            return None
+        return entry[1]
+
+
+def _store_page_cursor(cache_key: bytes, cursor: Dict[str, Any]) -> None:
+    """Remembers where the next page of a search starts, for as long as the page is cached."""
+    with _SEARCH_CACHE_LOCK:
+        _PAGE_CURSORS[cache_key] = (time.monotonic() + _SEARCH_CACHE_TTL_SECONDS, cursor)
+        _PAGE_CURSORS.move_to_end(cache_key)
+        while len(_PAGE_CURSORS) > _PAGE_CURSOR_MAX_ENTRIES:
+            _PAGE_CURSORS.popitem(last=False)
+
 
-    def create_conversation_thread(self) -> str:
+def _check_pooled_engine(db: Session) -> None:
+    """
+    Warns (once per process) if the session is not backed by a connection pool.
+    Tool calls hit the database several times per run; without pooling (and the
+    pool_pre_ping/pool_recycle options from database_config) each of them pays for a
+    new connection or risks a stale one.
+    """
+    global _POOL_CHECKED
+    if _POOL_CHECKED:
+        return
+    _POOL_CHECKED = True
+    if isinstance(db.get_bind().pool, NullPool):
+        logger.warning(
+            "CharityFundAssistant is running on an engine without a connection pool; "
+            "database tool calls will open a new connection each time. "
+            "Use the engine from core.database (see get_database_config)."
+        )
+
+
+class CharityFundAssistant:
+    """
+    Assistant specifically designed for charity fund discovery use case.
+    Manages conversation history and integrates with company database.
+    """
+
+    # Kept on the class for callers and the assistant cache key
+    system_instructions = SYSTEM_INSTRUCTIONS
+
+    # Conversation history per thread_id, newest message first (the order messages.list
+    # returns). Kept on the class so it is shared by every instance. Messages added
+    # through this class are appended locally so a turn doesn't need to re-fetch the
+    # whole thread from OpenAI.
+    # Each entry is (ID of the newest message, history), so a refresh only has to fetch
+    # the messages created after it.
+    _history_cache: "OrderedDict[str, Tuple[str, List[Dict[str, Any]]]]" = OrderedDict()
+    _history_cache_lock = threading.Lock()
+    _HISTORY_CACHE_MAX_THREADS = 1024
+
+    def __init__(self):
+        self.client = get_openai_client()
+
+    async def create_assistant(self) -> str:
+        """
+        Create an OpenAI assistant configured for charity fund discovery.
+        The ID is cached per configuration, so repeated calls reuse the same assistant
+        instead of creating a new one for every conversation. The configuration hash is
+        also stored in the assistant's metadata, so it is found again after a restart.
+        Returns the assistant ID.
+        """
+        cache_key = hashlib.sha1(
+            (model_name() + self.system_instructions + _TOOLS_SCHEMA_JSON).encode("utf-8")
+        ).hexdigest()
+        cached_id = _ASSISTANT_ID_CACHE.get(cache_key)
+        if cached_id:
+            return cached_id
+
+        # Without the lock two concurrent cold requests could both create an assistant
+        async with _ASSISTANT_ID_LOCK:
+            cached_id = _ASSISTANT_ID_CACHE.get(cache_key)
+            if cached_id:
+                return cached_id
+
+            try:
+                # Reuse the assistant created with this configuration before a restart.
+                # Assistants are listed newest first; one page is enough to find it.
+                existing = await self.client.beta.assistants.list(limit=100)
+                for assistant in existing.data:
+                    if (assistant.metadata or {}).get("config_hash") == cache_key:
+                        _ASSISTANT_ID_CACHE[cache_key] = assistant.id
+                        logger.info("Reusing assistant: %s", assistant.id)
+                        return assistant.id
+
+                assistant = await self.client.beta.assistants.create(
+                    model=model_name(),
+                    name="Charity Fund Discovery Assistant",
+                    instructions=self.system_instructions,
+                    tools=_TOOLS_SCHEMA,
+                    metadata={"config_hash": cache_key}
+                )
+                _ASSISTANT_ID_CACHE[cache_key] = assistant.id
+
+                logger.info("Created assistant: %s", assistant.id)
+                return assistant.id
+
+            except Exception as e:
+                logger.error("Error creating assistant: %s", e)
+                raise
+
+    async def create_conversation_thread(self, initial_messages: Optional[List[Dict[str, str]]] = None) -> str:
         """
         Create a new conversation thread for maintaining history.
+        `initial_messages` ({"role", "content"} dicts) are added by the same request,
+        in order, instead of one messages.create call per message.
         Returns the thread ID.
         """
+        if not initial_messages and WARM_THREAD_POOL_SIZE > 0:
+            # An empty thread can come from the warm pool
+            self._refill_warm_threads()
+            if _WARM_THREADS:
+                return _WARM_THREADS.popleft()
+
         try:
-            thread = self.client.beta.threads.create()
-            print(f"✅ Created conversation thread: {thread.id}")
+            if initial_messages:
+                thread = await self.client.beta.threads.create(messages=initial_messages)
+            else:
+                thread = await self.client.beta.threads.create()
+            logger.info("Created conversation thread: %s (%d initial messages)", thread.id, len(initial_messages or []))
             return thread.id
         except Exception as e:
-            print(f"❌ Error creating thread: {str(e)}")
+            logger.error("Error creating thread: %s", e)
             raise
 
-    def add_message_to_thread(self, thread_id: str, message: str, role: str = "user", metadata: Optional[Dict[str, Any]] = None) -> str:
+    def _refill_warm_threads(self) -> None:
+        """Starts topping up the warm thread pool in the background if it runs low."""
+        global _WARM_THREADS_REFILL
+        if len(_WARM_THREADS) > WARM_THREAD_POOL_LOW_WATER:
+            return
+        if _WARM_THREADS_REFILL is not None and not _WARM_THREADS_REFILL.done():
+            return
+
+        async def _refill() -> None:
+            missing = WARM_THREAD_POOL_SIZE - len(_WARM_THREADS)
+            results = await asyncio.gather(
+                *(self.client.beta.threads.create() for _ in range(missing)),
+                return_exceptions=True
+            )
+            errors = [result for result in results if isinstance(result, BaseException)]
+            _WARM_THREADS.extend(result.id for result in results if not isinstance(result, BaseException))
+            if errors:
+                logger.warning("Could not create %d of %d warm threads: %s", len(errors), missing, errors[0])
+
+        _WARM_THREADS_REFILL = asyncio.get_running_loop().create_task(_refill())
+
+    async def add_message_to_thread(self, thread_id: str, message: str, role: str = "user", metadata: Optional[Dict[str, Any]] = None) -> str:
         """
         Add a message to an existing conversation thread, with optional metadata.
-        This version automatically converts non-string metadata values to JSON strings.
+        This version automatically converts non-string metadata values to JSON strings
+        (tagged with _JSON_METADATA_PREFIX).
         """
-        processed_metadata = {}
-        if metadata:
+        processed_metadata = metadata or None
+        # Only rebuild the dict when some value actually needs converting; no metadata
+        # or all-string metadata (the common cases) is passed through as-is
+        if metadata and not all(isinstance(value, str) for value in metadata.values()):
+            processed_metadata = {}
             for key, value in metadata.items():
                 if not isinstance(value, str):
                     # If value is a list, dict, or number, convert it to a JSON string
-                    print(f"🔄 Converting metadata key '{key}' to JSON string.")
-                    processed_metadata[key] = json.dumps(value, ensure_ascii=False)
+                    logger.debug("Converting metadata key %r to JSON string", key)
+                    processed_metadata[key] = _JSON_METADATA_PREFIX + orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
                 else:
                     processed_metadata[key] = value
 
         try:
-            message_obj = self.client.beta.threads.messages.create(
+            message_obj = await self.client.beta.threads.messages.create(
                 thread_id=thread_id,
                 role=role,
                 content=message,
-                # Use the processed metadata. Pass None if it's empty.
-                metadata=processed_metadata if processed_metadata else None
+                # Use the processed metadata (None if there is none)
+                metadata=processed_metadata
             )
+            self._record_history_message(thread_id, message_obj.id, role, message, metadata)
             return message_obj.id
         except Exception as e:
-            print(f"❌ Error adding message to thread: {str(e)}")
+            logger.error("Error adding message to thread: %s", e)
             raise
 
-    def run_assistant_with_tools(
+    async def run_assistant_with_tools(
         self,
         assistant_id: str,
         thread_id: str,
         db: Session,
         instructions: Optional[str] = None,
-        chat_id: Optional[uuid.UUID] = None
+        chat_id: Optional[uuid.UUID] = None,
+        user_message: Optional[str] = None,
+        on_text_delta: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         Runs the assistant. Returns the company data instead of saving it to metadata.
         This version does NOT reference tax_payment_2025.
+        A `user_message` is added to the thread by the run itself, which saves the
+        separate add_message_to_thread request. `on_text_delta` is awaited with each
+        piece of the reply as the model produces it.
         """
-        companies_found_in_turn = []
+        # Keyed by company ID: the assistant often looks up the same companies again
+        # (search, then details), which should not produce duplicates in the response.
+        # A later entry (e.g. the detailed record) replaces the earlier one.
+        companies_found_in_turn: Dict[Any, Dict[str, Any]] = {}
+        _check_pooled_engine(db)
+        # CompanyService only wraps the session, so one instance serves every tool call
+        company_service = CompanyService(db)
+        # get_company_by_id results of this run, the model often asks for the same company again
+        company_details_cache: Dict[str, Dict[str, Any]] = {}
 
-        print(f"[run_assistant_with_tools] Using assistant_id={assistant_id}, thread_id={thread_id}")
+        logger.debug("[run_assistant_with_tools] Using assistant_id=%s, thread_id=%s", assistant_id, thread_id)
 
+        # Upper bound for the whole run, including tool calls. A stuck run would otherwise
+        # hold the request (and its pooled DB connection) indefinitely.
+        run_timeout = _SETTINGS.OPENAI_RUN_TIMEOUT_SECONDS
+        deadline = time.monotonic() + run_timeout
+        run_id = None
         try:
-            run = self.client.beta.threads.runs.create(
+            # Stream the run instead of polling it: tool calls arrive as events as soon as
+            # the model emits them, and the final reply comes with the stream, so no
+            # messages.list round-trip is needed afterwards.
+            # Without an explicit override the run uses the assistant's own (static)
+            # instructions, so the prompt prefix is identical on every run
+            run_options: Dict[str, Any] = {}
+            if instructions:
+                run_options["instructions"] = instructions
+            if user_message is not None:
+                run_options["additional_messages"] = [{"role": "user", "content": user_message}]
+            stream_manager = self.client.beta.threads.runs.stream(
                 thread_id=thread_id,
                 assistant_id=assistant_id,
-                instructions=instructions or "Help the user find potential corporate sponsors for their charity fund. Use the provided functions to search for companies and provide detailed information."
+                **run_options,
+                # Also bounds the wait for each next event, so a silent stream can't block
+                # past the run deadline
+                timeout=run_timeout
             )
+            latest_message = None
+            # Every assistant message of the run as (ID, text, metadata), in order. Text
+            # written before a tool call is a message of its own, and all of them belong
+            # in the history cache.
+            completed_messages: List[Tuple[str, str, Optional[Dict[str, Any]]]] = []
+            # Set when an assistant message had no text, which the cache cannot mirror
+            history_incomplete = False
+            # Status of a run that ended without completing (failed, cancelled, expired)
+            run_end_status = None
+            while stream_manager is not None:
+                next_stream_manager = None
+                async with stream_manager as stream:
+                    async for event in stream:
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"Assistant run exceeded {run_timeout}s")
 
-            while run.status in ["queued", "in_progress", "requires_action"]:
-                time.sleep(1)
-                run = self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+                        if event.event == "thread.run.created":
+                            run_id = event.data.id
 
-                if run.status == "requires_action":
-                    tool_outputs = []
-                    for tool_call in run.required_action.submit_tool_outputs.tool_calls:
-                        function_name = tool_call.function.name
-                        function_args = json.loads(tool_call.function.arguments)
-                        print(f"🔧 Executing function: {function_name} with args: {function_args}")
+                        elif event.event == "thread.message.delta" and on_text_delta is not None:
+                            for part in event.data.delta.content or []:
+                                if part.type == "text" and part.text and part.text.value:
+                                    await on_text_delta(part.text.value)
 
-                        if function_name == "search_companies":
-                            try:
-                                company_service = CompanyService(db)
-                                limit = int(function_args.get("limit", 50))
-                                page = function_args.get("page")
-                                if page is None:
-                                    # If AI didn't provide page, calculate it based on chat history
-                                    if chat_id:
-                                        # Use the chat_id to count previous search requests
-                                        from ..chats import service as chat_service
-                                        prev_search_calls = chat_service.count_search_requests(db, chat_id)
-                                        # Calculate page: (prev_search_calls - 1) + 1
-                                        # First search: prev_search_calls=1, page=1
-                                        # Second search: prev_search_calls=2, page=2
-                                        # Third search: prev_search_calls=3, page=3
-                                        page = max(1, (prev_search_calls - 1) + 1)
-                                        print(f"[Pagination] Calculated page={page} (prev_search_calls={prev_search_calls}, limit={limit})")
-                                    else:
-                                        # Fallback to page=1 if no chat_id available
-                                        page = 1
-                                        print(f"[Pagination] Using default page={page} (no chat_id available)")
-                                else:
-                                    page = int(page)
-                                    print(f"[Pagination] Using AI-provided page={page}")
-
-                                
-                                companies = company_service.search_companies(
-                                    location=function_args.get("location"),
-                                    company_name=function_args.get("company_name"),
-                                    activity_keywords=function_args.get("activity_keywords"),
-                                    limit=limit,
-                                    offset=(page - 1) * limit
+                        elif event.event == "thread.message.completed" and event.data.role == "assistant":
+                            text_parts = [part.text.value for part in event.data.content if part.type == "text"]
+                            if text_parts:
+                                latest_message = "".join(text_parts)
+                                completed_messages.append((event.data.id, latest_message, event.data.metadata))
+                            else:
+                                history_incomplete = True
+
+                        elif event.event == "thread.run.requires_action":
+                            run = event.data
+                            tool_calls = run.required_action.submit_tool_outputs.tool_calls
+                            if len(tool_calls) == 1:
+                                # The handlers do blocking DB work, keep it off the event loop
+                                tool_work = asyncio.ensure_future(asyncio.to_thread(
+                                    lambda: [self._handle_tool_call(tool_calls[0], company_service, chat_id, company_details_cache)]
+                                ))
+                            else:
+                                # The model emitted several calls in one step, run the independent
+                                # ones concurrently. A Session is not thread-safe, so every worker
+                                # gets its own session bound to the same (pooled) engine.
+                                tool_work = asyncio.ensure_future(
+                                    self._run_tool_calls_concurrently(tool_calls, db, chat_id, company_details_cache)
                                 )
-                                formatted_companies = []
-                                for company_dict in companies:
-                                    formatted_company = {
-                                        "id": company_dict.get("id"),
-                                        "name": company_dict.get("name"),
-                                        "bin": company_dict.get("bin"),
-                                        "activity": company_dict.get("activity"),
-                                        "location": company_dict.get("locality"),
-                                        "oked": company_dict.get("oked_code"),
-                                        "size": company_dict.get("company_size"),
-                                        "kato": company_dict.get("kato_code"),
-                                        "krp": company_dict.get("krp_code"),
-                                        "tax_data_2023": company_dict.get("tax_data_2023"),
-                                        "tax_data_2024": company_dict.get("tax_data_2024"),
-                                        "tax_data_2025": company_dict.get("tax_data_2025"),
-                                        "contacts": company_dict.get("contacts"),
-                                        "website": company_dict.get("website"),
-                                    }
-                                    formatted_companies.append(formatted_company)
-                                    companies_found_in_turn.append(formatted_company)
-                                
-                                result = {"companies": formatted_companies, "total_found": len(formatted_companies), "search_criteria": function_args, "page": page, "limit": limit}
-                                tool_outputs.append({"tool_call_id": tool_call.id, "output": json.dumps(result, ensure_ascii=False)})
-                                print(f"✅ Search completed: {len(formatted_companies)} companies found")
-                            except Exception as e:
-                                print(f"❌ Error in search_companies: {str(e)}")
-                                tool_outputs.append({"tool_call_id": tool_call.id, "output": f"Error searching companies: {str(e)}."})
-
-                        elif function_name == "get_company_details":
                             try:
-                                company_service = CompanyService(db)
-                                company_id = function_args.get("company_id")
-                                company_dict = company_service.get_company_by_id(company_id)
-                                if company_dict:
-                                    company_details = {
-                                        "id": company_dict.get("id"),
-                                        "name": company_dict.get("name"),
-                                        "bin": company_dict.get("bin"),
-                                        "registration_date": company_dict.get("registration_date"),
-                                        "address": company_dict.get("address"),
-                                        "activity": company_dict.get("activity"),
-                                        "ceo_name": company_dict.get("ceo_name"),
-                                        "locality": company_dict.get("locality"),
-                                        "tax_payments": company_dict.get("tax_payments", []),
-                                        "founders": company_dict.get("founder_names", [])
-                                    }
-                                    companies_found_in_turn.append(company_details)
-                                    tool_outputs.append({"tool_call_id": tool_call.id, "output": json.dumps(company_details, ensure_ascii=False)})
-                                else:
-                                    tool_outputs.append({"tool_call_id": tool_call.id, "output": f"Company with ID {company_id} not found."})
-                            except Exception as e:
-                                print(f"❌ Error in get_company_details: {str(e)}")
-                                tool_outputs.append({"tool_call_id": tool_call.id, "output": f"Error fetching company details: {str(e)}."})
-
-                    run = self.client.beta.threads.runs.submit_tool_outputs(
-                        thread_id=thread_id,
-                        run_id=run.id,
-                        tool_outputs=tool_outputs,
-                    )
+                                results = await asyncio.shield(tool_work)
+                            except asyncio.CancelledError:
+                                # Worker threads can't be interrupted and may be using `db`; let
+                                # them finish before the caller gets to close the session
+                                await asyncio.wait({tool_work})
+                                raise
 
-            messages = self.client.beta.threads.messages.list(thread_id=thread_id)
-            latest_message = messages.data[0].content[0].text.value if messages.data else "No response from assistant."
+                            # Results come back in tool_calls order, keeping the tool_call_id mapping
+                            tool_outputs = []
+                            for tool_output, companies in results:
+                                tool_outputs.append(tool_output)
+                                for company in companies:
+                                    company_key = company.get("id")
+                                    if company_key is None:
+                                        company_key = id(company)
+                                    companies_found_in_turn[company_key] = company
+
+                            # The current stream ends here; the run continues on a new stream
+                            next_stream_manager = self.client.beta.threads.runs.submit_tool_outputs_stream(
+                                thread_id=thread_id,
+                                run_id=run.id,
+                                tool_outputs=tool_outputs,
+                                timeout=max(deadline - time.monotonic(), 1)
+                            )
+
+                        elif event.event in ("thread.run.failed", "thread.run.cancelled", "thread.run.expired"):
+                            logger.warning("Run %s ended with status %r", event.data.id, event.data.status)
+                            run_end_status = event.data.status
+
+                stream_manager = next_stream_manager
+
+            if run_end_status is not None or latest_message is None:
+                # No usable reply; reported as an error so callers don't keep or cache it
+                if user_message is not None:
+                    self._forget_history(thread_id)
+                return {
+                    "status": "error",
+                    "message": (
+                        f"The assistant run ended ({run_end_status}). Please try again."
+                        if run_end_status is not None else "No response from assistant."
+                    ),
+                    "companies": list(companies_found_in_turn.values()),
+                }
+
+            if history_incomplete:
+                self._forget_history(thread_id)
+            else:
+                if user_message is not None:
+                    # The run doesn't report the ID of the message it added; the first
+                    # reply's ID stands in for it (the last one ends up as the newest)
+                    self._record_history_message(thread_id, completed_messages[0][0], "user", user_message)
+                for message_id, text, metadata in completed_messages:
+                    self._record_history_message(thread_id, message_id, "assistant", text, metadata)
 
             return {
                 "message": latest_message,
-                "companies": companies_found_in_turn,
+                "companies": list(companies_found_in_turn.values()),
+            }
+
+        except asyncio.CancelledError:
+            # The caller went away (e.g. a streaming client disconnected). An active run
+            # would block every later message on the thread until it expires, so it is
+            # cancelled on OpenAI's side as well, shielded from this cancellation.
+            if user_message is not None:
+                self._forget_history(thread_id)
+            if run_id:
+                try:
+                    await asyncio.shield(self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id))
+                except Exception as cancel_error:
+                    logger.error("Error cancelling run %s: %s", run_id, cancel_error)
+            raise
+
+        except (TimeoutError, APITimeoutError) as e:
+            logger.warning("Assistant run timed out: %s", e)
+            if user_message is not None:
+                self._forget_history(thread_id)
+            if run_id:
+                try:
+                    await self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+                except Exception as cancel_error:
+                    logger.error("Error cancelling run %s: %s", run_id, cancel_error)
+            return {
+                "status": "error",
+                "message": "The assistant took too long to respond. Please try again.",
+                # Keep whatever the tool calls found before the timeout
+                "companies": list(companies_found_in_turn.values())
             }
 
         except Exception as e:
-            print(f"❌ Error running assistant: {str(e)}")
+            logger.error("Error running assistant: %s", e)
+            if user_message is not None:
+                self._forget_history(thread_id)
             return {
                 "status": "error",
                 "message": f"An error occurred while running the assistant: {str(e)}",
                 "companies": []
             }
 
-    def get_conversation_history(self, thread_id: str) -> List[Dict[str, Any]]:
+    async def _run_tool_calls_concurrently(
+        self,
+        tool_calls: List[Any],
+        db: Session,
+        chat_id: Optional[uuid.UUID] = None,
+        details_cache: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> List[Tuple[Dict[str, str], List[Dict[str, Any]]]]:
+        """
+        Executes several tool calls in parallel threads, each with its own DB session.
+        Calls with conflicting accesses (see TOOL_DEPENDS) are run one after another.
+        Results are returned in the same order as `tool_calls`.
+        """
+        bind = db.get_bind()
+        if details_cache is None:
+            details_cache = {}
+        # Several get_company_details calls are answered by one `IN (...)` query; the
+        # handlers then find their company in details_cache
+        await asyncio.to_thread(self._prefetch_company_details, tool_calls, CompanyService(db), details_cache)
+
+        def _worker(tool_call: Any) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+            # Every tool_call_id needs an output, so one failing call must not take down
+            # the others: turn its exception into an error output instead.
+            try:
+                worker_db = Session(bind=bind)
+                try:
+                    return self._handle_tool_call(tool_call, CompanyService(worker_db), chat_id, details_cache)
+                finally:
+                    worker_db.close()
+            except Exception as e:
+                logger.error("Tool call %s (%s) failed: %s", tool_call.id, tool_call.function.name, e)
+                return {"tool_call_id": tool_call.id, "output": f"Error executing {tool_call.function.name}: {str(e)}."}, []
+
+        results: List[Tuple[Dict[str, str], List[Dict[str, Any]]]] = []
+        # Batches run one after another, the calls inside a batch run in parallel
+        # worker threads (the handlers do blocking DB work)
+        for batch in self._schedule_tool_calls(tool_calls):
+            results.extend(await asyncio.gather(*(asyncio.to_thread(_worker, tool_call) for tool_call in batch)))
+        return results
+
+    @staticmethod
+    def _prefetch_company_details(
+        tool_calls: List[Any],
+        company_service: CompanyService,
+        details_cache: Dict[str, Dict[str, Any]]
+    ) -> None:
         """
-        Get all messages from a conversation thread, including metadata.
+        Loads the companies of all get_company_details calls that aren't in
+        details_cache yet with a single query. Does nothing for fewer than two IDs.
         """
+        company_ids = []
+        for tool_call in tool_calls:
+            if tool_call.function.name != "get_company_details":
+                continue
+            try:
+                company_id = orjson.loads(tool_call.function.arguments or "{}").get("company_id")
+            except (orjson.JSONDecodeError, AttributeError):
+                continue
+            if isinstance(company_id, str) and company_id not in details_cache:
+                company_ids.append(company_id)
+
+        company_ids = list(dict.fromkeys(company_ids))
+        if len(company_ids) < 2:
+            return
+        # Not found / failed IDs are left to the handler's own lookup
+        for company_dict in company_service.get_companies_by_ids(company_ids):
+            details_cache[company_dict.get("bin")] = company_dict
+
+    @staticmethod
+    def _schedule_tool_calls(tool_calls: List[Any]) -> List[List[Any]]:
+        """
+        Splits tool calls into consecutive batches without conflicting accesses (see
+        TOOL_DEPENDS), preserving their order. With read-only tools this is one batch.
+        """
+        batches: List[List[Any]] = []
+        batch: List[Any] = []
+        batch_reads: set = set()
+        batch_writes: set = set()
+        for tool_call in tool_calls:
+            function_name = tool_call.function.name
+            mode, resource = TOOL_DEPENDS.get(function_name, ("write", function_name))
+            if mode == "read":
+                conflicts = resource in batch_writes
+            else:
+                conflicts = resource in batch_writes or resource in batch_reads
+            if conflicts and batch:
+                batches.append(batch)
+                batch, batch_reads, batch_writes = [], set(), set()
+
+            batch.append(tool_call)
+            (batch_reads if mode == "read" else batch_writes).add(resource)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _handle_tool_call(
+        self,
+        tool_call: Any,
+        company_service: CompanyService,
+        chat_id: Optional[uuid.UUID] = None,
+        details_cache: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+        """
+        Executes a single tool call requested by the assistant.
+        `details_cache` memoizes get_company_details lookups within one run.
+        Returns the tool output to submit and the companies found by the call.
+        """
+        function_name = tool_call.function.name
         try:
-            messages = self.client.beta.threads.messages.list(thread_id=thread_id)
-            history = []
-            for msg in messages.data:
-                content = msg.content[0].text.value if msg.content else ""
-                metadata = msg.metadata if msg.metadata else {}
-                
-                # Try to parse metadata values back from JSON strings if they were stringified
-                parsed_metadata = {}
-                for key, value in metadata.items():
+            function_args = orjson.loads(tool_call.function.arguments or "{}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Invalid arguments for %s: %s", function_name, e)
+            return {"tool_call_id": tool_call.id, "output": f"Invalid function arguments: {str(e)}."}, []
+        logger.debug("Executing function: %s args=%s", function_name, function_args)
+
+        if function_name == "search_companies":
+            try:
+                try:
+                    limit = int(function_args.get("limit", 50))
+                except (TypeError, ValueError):
+                    limit = 50
+                # Guard against zero/negative and pathological page sizes
+                limit = 50 if limit <= 0 else min(limit, 200)
+                page = function_args.get("page")
+                if page is None:
+                    # If AI didn't provide page, calculate it based on chat history
+                    if chat_id:
+                        # Use the chat_id to count previous search requests
+                        prev_search_calls = chat_service.count_search_requests(company_service.db, chat_id)
+                        # Calculate page: (prev_search_calls - 1) + 1
+                        # First search: prev_search_calls=1, page=1
+                        # Second search: prev_search_calls=2, page=2
+                        # Third search: prev_search_calls=3, page=3
+                        page = max(1, (prev_search_calls - 1) + 1)
+                        logger.debug("[Pagination] Calculated page=%s (prev_search_calls=%s, limit=%s)", page, prev_search_calls, limit)
+                    else:
+                        # Fallback to page=1 if no chat_id available
+                        page = 1
+                        logger.debug("[Pagination] Using default page=%s (no chat_id available)", page)
+                else:
                     try:
-                        # Attempt to load value as JSON, if it fails, keep it as a string
-                        parsed_metadata[key] = json.loads(value)
-                    except (json.JSONDecodeError, TypeError):
-                        parsed_metadata[key] = value
+                        page = max(1, int(page or 1))
+                    except (TypeError, ValueError):
+                        page = 1
+                    logger.debug("[Pagination] Using AI-provided page=%s", page)
+
+                offset = (page - 1) * limit
+                search_params = {
+                    "location": function_args.get("location"),
+                    "company_name": function_args.get("company_name"),
+                    "activity_keywords": function_args.get("activity_keywords"),
+                    "limit": limit,
+                    "offset": offset,
+                }
+                # Keyed by the resolved page/limit rather than the raw arguments, since the
+                # page may have been derived from the chat history
+                cache_key = _search_cache_key(search_params)
+                rows = _get_cached_search(cache_key)
+                if rows is not None:
+                    logger.debug("Search cache hit (%d hits / %d misses)", _SEARCH_CACHE_STATS["hits"], _SEARCH_CACHE_STATS["misses"])
+                else:
+                    # When the previous page was served here, continue right after its
+                    # last row (keyset) instead of making Postgres skip `offset` rows
+                    companies = company_service.search_companies(
+                        **search_params,
+                        after=_get_page_cursor(cache_key) if offset else None
+                    )
+                    rows = [_company_row(company_dict) for company_dict in companies]
+                    # An empty list may also mean the query failed, don't keep that around
+                    if rows:
+                        _store_cached_search(cache_key, rows)
+                    # Only a page just read from the database gives a current cursor; a
+                    # cached page keeps the cursor stored when it was read
+                    if len(rows) == limit:
+                        next_page_key = _search_cache_key({**search_params, "offset": offset + limit})
+                        _store_page_cursor(next_page_key, CompanyService.search_cursor(companies[-1]))
+                formatted_companies = [dict(zip(COMPANY_OUTPUT_KEYS, row)) for row in rows]
+
+                result = {"companies": formatted_companies, "total_found": len(formatted_companies), "search_criteria": function_args, "page": page, "limit": limit}
+                logger.debug("Search completed: %d companies found", len(formatted_companies))
+                return {"tool_call_id": tool_call.id, "output": orjson.dumps(result).decode()}, formatted_companies
+            except Exception as e:
+                logger.error("Error in search_companies: %s", e)
+                return {"tool_call_id": tool_call.id, "output": f"Error searching companies: {str(e)}."}, []
+
+        elif function_name == "get_company_details":
+            try:
+                company_id = function_args.get("company_id")
+                company_dict = details_cache.get(company_id) if details_cache is not None else None
+                if company_dict is None:
+                    company_dict = company_service.get_company_by_id(company_id)
+                    # None also means a failed lookup, so only found companies are kept
+                    if company_dict and details_cache is not None:
+                        details_cache[company_id] = company_dict
+                if company_dict:
+                    company_details = _format_company_details(company_dict)
+                    return {"tool_call_id": tool_call.id, "output": orjson.dumps(company_details).decode()}, [company_details]
+                return {"tool_call_id": tool_call.id, "output": f"Company with ID {company_id} not found."}, []
+            except Exception as e:
+                logger.error("Error in get_company_details: %s", e)
+                return {"tool_call_id": tool_call.id, "output": f"Error fetching company details: {str(e)}."}, []
+
+        elif function_name == "get_company_details_bulk":
+            try:
+                company_ids = [str(company_id) for company_id in function_args.get("company_ids") or []]
+                found: Dict[str, Dict[str, Any]] = {}
+                missing_ids = []
+                for company_id in dict.fromkeys(company_ids):
+                    cached = details_cache.get(company_id) if details_cache is not None else None
+                    if cached is not None:
+                        found[company_id] = cached
+                    else:
+                        missing_ids.append(company_id)
+
+                # One query for every company not looked up yet in this run
+                if missing_ids:
+                    for company_dict in company_service.get_companies_by_ids(missing_ids):
+                        found[company_dict.get("bin")] = company_dict
+                        if details_cache is not None:
+                            details_cache[company_dict.get("bin")] = company_dict
+
+                companies_details = [
+                    _format_company_details(found[company_id])
+                    for company_id in dict.fromkeys(company_ids)
+                    if company_id in found
+                ]
+                result = {
+                    "companies": companies_details,
+                    "not_found": [company_id for company_id in dict.fromkeys(company_ids) if company_id not in found],
+                }
+                return {"tool_call_id": tool_call.id, "output": orjson.dumps(result).decode()}, companies_details
+            except Exception as e:
+                logger.error("Error in get_company_details_bulk: %s", e)
+                return {"tool_call_id": tool_call.id, "output": f"Error fetching company details: {str(e)}."}, []
+
+        # Every tool call needs an output, otherwise the run cannot continue
+        logger.warning("Unknown function requested: %s", function_name)
+        return {"tool_call_id": tool_call.id, "output": f"Unknown function: {function_name}."}, []
+
+    def _record_history_message(
+        self,
+        thread_id: str,
+        message_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Adds a message we just created to the cached history of its thread.
+        Only threads that were fully fetched before are cached, so a partial history
+        is never served.
+        """
+        with self._history_cache_lock:
+            cached = self._history_cache.get(thread_id)
+            if cached is not None:
+                history = cached[1]
+                history.insert(0, {"role": role, "content": content, "metadata": dict(metadata or {})})
+                self._history_cache[thread_id] = (message_id, history)
+                self._history_cache.move_to_end(thread_id)
+
+    def _forget_history(self, thread_id: str) -> None:
+        """Drops the cached history of a thread, so the next read fetches it again."""
+        with self._history_cache_lock:
+            self._history_cache.pop(thread_id, None)
+
+    @staticmethod
+    def _history_entry(msg: Any) -> Dict[str, Any]:
+        """Converts a thread message into a history entry, including its metadata."""
+        content = msg.content[0].text.value if msg.content else ""
+        metadata = msg.metadata if msg.metadata else {}
+
+        # Parse back the values add_message_to_thread stringified; plain strings are kept
+        parsed_metadata = {}
+        for key, value in metadata.items():
+            if isinstance(value, str) and value.startswith(_JSON_METADATA_PREFIX):
+                json_value = value[len(_JSON_METADATA_PREFIX):]
+            elif isinstance(value, str) and value[:1] in ("{", "["):
+                # Stored before values were tagged
+                json_value = value
+            else:
+                parsed_metadata[key] = value
+                continue
+            try:
+                parsed_metadata[key] = orjson.loads(json_value)
+            except orjson.JSONDecodeError:
+                parsed_metadata[key] = value
+
+        return {"role": msg.role, "content": content, "metadata": parsed_metadata}
+
+    async def get_conversation_history(
+        self,
+        thread_id: str,
+        use_cache: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all messages from a conversation thread (newest first), including metadata,
+        or only the newest `limit` ones.
+        With use_cache=True a previously fetched history (kept up to date with the
+        messages added since) is returned without calling OpenAI. Otherwise a cached
+        thread is refreshed with only the messages created after the newest known one.
+        """
+        with self._history_cache_lock:
+            cached = self._history_cache.get(thread_id)
+            if cached is not None:
+                self._history_cache.move_to_end(thread_id)
+                if use_cache:
+                    return list(cached[1][:limit])
+
+        try:
+            if cached is None and limit is not None:
+                # Only the tail is needed: fetch just that instead of the whole thread.
+                # A partial history isn't cached, the cache relies on complete ones.
+                history = []
+                async for msg in self.client.beta.threads.messages.list(thread_id=thread_id, limit=min(limit, 100), order="desc"):
+                    history.append(self._history_entry(msg))
+                    if len(history) >= limit:
+                        break
+                return history
+
+            if cached is not None:
+                newest_id, history = cached[0], list(cached[1])
+                # Oldest first, so every new message goes in front of the previous one
+                async for msg in self.client.beta.threads.messages.list(thread_id=thread_id, order="asc", after=newest_id):
+                    history.insert(0, self._history_entry(msg))
+                    newest_id = msg.id
+            else:
+                # Iterating the page follows the cursor, so threads with more messages
+                # than one page (20 by default) are fetched completely. Newest first.
+                newest_id, history = None, []
+                async for msg in self.client.beta.threads.messages.list(thread_id=thread_id, limit=100):
+                    if newest_id is None:
+                        newest_id = msg.id
+                    history.append(self._history_entry(msg))
+                if newest_id is None:
+                    # Empty thread, nothing to fetch incrementally from
+                    return []
 
-                history.append({"role": msg.role, "content": content, "metadata": parsed_metadata})
-            return history
+            with self._history_cache_lock:
+                self._history_cache[thread_id] = (newest_id, history)
+                self._history_cache.move_to_end(thread_id)
+                while len(self._history_cache) > self._HISTORY_CACHE_MAX_THREADS:
+                    self._history_cache.popitem(last=False)
+            return list(history[:limit])
         except Exception as e:
-            print(f"❌ Error getting conversation history: {str(e)}")
+            logger.error("Error getting conversation history: %s", e)
             return []
 
-    def sync_history_with_thread(self, thread_id: str, external_history: List[Dict[str, Any]]) -> str:
+    async def sync_history_with_thread(self, thread_id: str, external_history: List[Dict[str, Any]]) -> str:
         """
         Synchronizes an external chat history (e.g., from a database) with an OpenAI thread.
         This is a simplified version that adds missing messages. A more robust implementation
         would handle out-of-order messages or conflicts.
         """
+        if not external_history:
+            # Nothing to sync, skip listing the thread
+            return "Sync completed"
+
         try:
-            thread_messages = self.client.beta.threads.messages.list(thread_id=thread_id, order="asc")
-            thread_message_contents = [msg.content[0].text.value for msg in thread_messages.data]
+            # Iterate the whole cursor: reading only the first page (20 messages by
+            # default) made older messages look missing and re-added them on every sync
+            thread_messages = self.client.beta.threads.messages.list(thread_id=thread_id, order="asc", limit=100)
+            # A set of (role, content digest) pairs gives O(1) membership tests instead of
+            # scanning every thread message for each external entry, without holding on
+            # to the (possibly multi-KB) message texts.
+            thread_message_keys = {
+                _message_fingerprint(msg.role, msg.content[0].text.value)
+                async for msg in thread_messages
+                if msg.content
+            }
 
+            missing_messages = []
             for entry in external_history:
-                if entry["content"] not in thread_message_contents:
-                    print(f"➕ Syncing missing message to thread {thread_id}: '{entry['content'][:30]}...'")
-                    self.add_message_to_thread(
-                        thread_id=thread_id,
-                        message=entry["content"],
-                        role=entry["role"],
-                        metadata=entry.get("metadata", {})
-                    )
+                entry_key = _message_fingerprint(entry.get("role"), entry.get("content"))
+                if entry_key not in thread_message_keys:
+                    thread_message_keys.add(entry_key)
+                    missing_messages.append(entry)
+
+            # Thread messages are ordered by creation time and the API has no bulk insert,
+            # so the missing messages are added one by one: concurrent creates would
+            # race and scramble the conversation order the assistant reads.
+            for entry in missing_messages:
+                logger.debug("Syncing missing message to thread %s: %.30r", thread_id, entry["content"])
+                await self.add_message_to_thread(
+                    thread_id=thread_id,
+                    message=entry["content"],
+                    role=entry["role"],
+                    metadata=entry.get("metadata", {})
+                )
+            # The thread may have changed outside this process, re-fetch next time
+            self._forget_history(thread_id)
             return "Sync completed"
         except Exception as e:
-            print(f"❌ Error syncing history: {str(e)}")
+            logger.error("Error syncing history: %s", e)
             raise
 
-    def cleanup_assistant(self, assistant_id: str):
+    async def cleanup_assistant(self, assistant_id: str):
         """
         Deletes the assistant from OpenAI to avoid clutter.
         """
         try:
-            response = self.client.beta.assistants.delete(assistant_id)
-            print(f"✅ Deleted assistant {assistant_id}: {response}")
+            response = await self.client.beta.assistants.delete(assistant_id)
+            # Never hand out a deleted assistant from the cache
+            _forget_assistant_id(assistant_id)
+            logger.info("Deleted assistant %s: %s", assistant_id, response)
         except Exception as e:
-            print(f"❌ Error deleting assistant {assistant_id}: {str(e)}")
+            logger.error("Error deleting assistant %s: %s", assistant_id, e)
 
 
-def create_charity_fund_assistant() -> str:
+async def create_charity_fund_assistant() -> str:
     """
     Standalone function to create the assistant.
     """
-    assistant_manager = CharityFundAssistant()
-    return assistant_manager.create_assistant()
+    assistant_manager = get_charity_assistant()
+    return await assistant_manager.create_assistant()
 
-def start_conversation(assistant_id: str, initial_message: str, db: Session) -> Dict[str, Any]:
+async def start_conversation(assistant_id: str, initial_message: str, db: Session) -> Dict[str, Any]:
     """
     Starts a new conversation with a welcome message and an initial user query.
     Returns the initial AI response, thread ID, and any company data.
     """
-    assistant_manager = CharityFundAssistant()
-    thread_id = assistant_manager.create_conversation_thread()
+    assistant_manager = get_charity_assistant()
+    thread_id = await assistant_manager.create_conversation_thread()
 
     # Add the initial user message
-    assistant_manager.add_message_to_thread(
+    await assistant_manager.add_message_to_thread(
         thread_id=thread_id,
         message=initial_message
     )
 
     # Run the assistant to get the first response
-    run_result = assistant_manager.run_assistant_with_tools(
+    run_result = await assistant_manager.run_assistant_with_tools(
         assistant_id=assistant_id,
         thread_id=thread_id,
         db=db
@@ -418,7 +1251,7 @@ def start_conversation(assistant_id: str, initial_message: str, db: Session) ->
         "companies": run_result.get("companies", [])
     }
 
-def continue_conversation(
+async def continue_conversation(
     assistant_id: str, 
     thread_id: str, 
     message: str, 
@@ -428,21 +1261,20 @@ def continue_conversation(
     Continues an existing conversation.
     Returns the latest AI response and any company data.
     """
-    assistant_manager = CharityFundAssistant()
-
-    # Add the new user message
-    assistant_manager.add_message_to_thread(thread_id=thread_id, message=message)
+    assistant_manager = get_charity_assistant()
 
-    # Run the assistant
-    run_result = assistant_manager.run_assistant_with_tools(
+    # Run the assistant; the run adds the new user message to the thread
+    run_result = await assistant_manager.run_assistant_with_tools(
         assistant_id=assistant_id,
         thread_id=thread_id,
         db=db,
-        instructions="Please continue the conversation based on the user's latest message."
+        user_message=message
     )
 
-    # Fetch the complete history to return to the client
-    history = assistant_manager.get_conversation_history(thread_id)
+    # Return the latest part of the history to the client (newest first)
+    history = await assistant_manager.get_conversation_history(
+        thread_id, use_cache=True, limit=CONVERSATION_HISTORY_LIMIT
+    )
 
     return {
         "message": run_result.get("message", "Error: No message from AI."),
@@ -451,29 +1283,60 @@ def continue_conversation(
     }
 
 
-def handle_conversation_with_context(
+async def handle_conversation_with_context(
     user_input: str,
     db: Session,
     user: User, # Changed from user_id to user object
     chat_id: Optional[uuid.UUID] = None,
-    assistant_id: Optional[str] = None
+    assistant_id: Optional[str] = None,
+    on_text_delta: Optional[Callable[[str], Awaitable[None]]] = None
 ) -> Dict[str, Any]:
     """
     Handles a user's message, maintaining conversation context within a single chat session.
+    `on_text_delta` receives the reply in pieces while it is generated (for streaming).
     It creates a new assistant and thread if they don't exist, or uses existing ones.
     This version returns company data directly instead of saving it to metadata.
+    The (sync) database calls run in worker threads so they don't block the event loop.
     """
-    assistant_manager = CharityFundAssistant()
+    assistant_manager = get_charity_assistant()
     
     current_chat = None
     if chat_id:
-        current_chat = chat_service.get_chat_by_id(db, chat_id, user.id)
+        # The previous reply may still be committing; its message must be stored
+        # before this turn reads the chat or adds the next one
+        await wait_for_chat_message_writes(chat_id)
+        current_chat = await asyncio.to_thread(chat_service.get_chat_by_id, db, chat_id, user.id)
+
+    # The opening question of a new chat has no thread context, so its answer can be
+    # served from the semantic cache (off by default; when on, every new chat makes an
+    # embeddings request before its run). Answers are only shared within the same
+    # user, location and search terms.
+    question_embedding = None
+    question_cache_scope = None
+    cached_response = None
+    if not current_chat and _SETTINGS.SEMANTIC_CACHE_ENABLED:
+        question_cache_scope = question_scope(user.id, user_input)
+        question_embedding = await _SEMANTIC_CACHE.embed(
+            assistant_manager.client, _SETTINGS.OPENAI_EMBEDDING_MODEL, user_input
+        )
+        if question_embedding is not None:
+            cached_response = _SEMANTIC_CACHE.lookup(question_embedding, question_cache_scope)
 
     # If no chat_id is provided or the chat doesn't exist, create a new one
     if not current_chat:
-        assistant_id = assistant_manager.create_assistant()
-        thread_id = assistant_manager.create_conversation_thread()
-        current_chat = chat_service.create_chat(
+        assistant_id = await assistant_manager.create_assistant()
+        if cached_response is not None:
+            # Seed the thread with the exchange so follow-ups keep their context
+            thread_id = await assistant_manager.create_conversation_thread(initial_messages=[
+                {"role": "user", "content": user_input},
+                {"role": "assistant", "content": cached_response["message"]},
+            ])
+        else:
+            thread_id = await assistant_manager.create_conversation_thread()
+        # Just created, no need to check that they exist on the next message
+        _set_openai_ids_validated(assistant_id, thread_id)
+        current_chat = await asyncio.to_thread(
+            chat_service.create_chat,
             db=db,
             user_id=user.id,
             name=user_input[:50],  # Use the first part of the message as the chat name
@@ -485,41 +1348,66 @@ def handle_conversation_with_context(
         assistant_id = current_chat.openai_assistant_id
         thread_id = current_chat.openai_thread_id
 
-        # Make sure the assistant and thread still exist on OpenAI's side
+        # Make sure the assistant and thread still exist on OpenAI's side (both checks at
+        # once, and not again for a while once they passed)
         try:
-            assistant_manager.client.beta.assistants.retrieve(assistant_id)
-            assistant_manager.client.beta.threads.retrieve(thread_id)
+            if not _openai_ids_validated(assistant_id, thread_id):
+                await asyncio.gather(
+                    assistant_manager.client.beta.assistants.retrieve(assistant_id),
+                    assistant_manager.client.beta.threads.retrieve(thread_id),
+                )
+                _set_openai_ids_validated(assistant_id, thread_id)
         except Exception:
             # If they don't exist, create new ones and update the chat
-            assistant_id = assistant_manager.create_assistant()
-            thread_id = assistant_manager.create_conversation_thread()
-            chat_service.update_chat_openai_ids(db, current_chat.id, assistant_id, thread_id)
+            _forget_assistant_id(assistant_id)
+            assistant_id = await assistant_manager.create_assistant()
+            # Carry the stored conversation over so the assistant keeps its context.
+            # current_chat.messages is lazy-loaded, so the SELECT runs in a worker thread.
+            thread_seed = await asyncio.to_thread(lambda: _build_thread_seed(current_chat.messages))
+            thread_id = await assistant_manager.create_conversation_thread(initial_messages=thread_seed)
+            await asyncio.to_thread(chat_service.update_chat_openai_ids, db, current_chat.id, assistant_id, thread_id)
+            _set_openai_ids_validated(assistant_id, thread_id)
             
-    print(f"[handle_conversation_with_context] Using assistant_id={assistant_id}, thread_id={thread_id}, chat_id={getattr(current_chat, 'id', None)}")
+    logger.debug("[handle_conversation_with_context] Using assistant_id=%s, thread_id=%s, chat_id=%s", assistant_id, thread_id, getattr(current_chat, "id", None))
     try:
         # Save the user's message to the database first
-        chat_service.create_message(db, chat_id=current_chat.id, content=user_input, role="user")
+        await asyncio.to_thread(chat_service.create_message, db, chat_id=current_chat.id, content=user_input, role="user")
 
-        # Add the message to the OpenAI thread
-        assistant_manager.add_message_to_thread(thread_id, user_input)
+        if cached_response is not None:
+            # The thread already holds the question and the cached answer
+            response = cached_response
+            if on_text_delta is not None:
+                await on_text_delta(response["message"])
+        else:
+            # Run the assistant and get the response, including any tool outputs (company
+            # data). The run adds the message to the OpenAI thread.
+            response = await assistant_manager.run_assistant_with_tools(
+                assistant_id, thread_id, db, chat_id=current_chat.id, user_message=user_input,
+                on_text_delta=on_text_delta
+            )
 
-        # Run the assistant and get the response, including any tool outputs (company data)
-        response = assistant_manager.run_assistant_with_tools(assistant_id, thread_id, db, chat_id=current_chat.id)
+            if response.get("status") == "error":
+                # The thread or assistant may be gone; check again on the next message
+                _set_openai_ids_validated(assistant_id, thread_id, valid=False)
+            elif question_embedding is not None and response.get("message"):
+                # Only completed replies get here; failed runs come back as errors
+                _SEMANTIC_CACHE.store(question_embedding, {
+                    "message": response["message"],
+                    "companies": response.get("companies", []),
+                }, question_cache_scope)
 
-        # Retrieve the latest assistant message from the thread
-        messages = assistant_manager.client.beta.threads.messages.list(thread_id=thread_id, limit=1)
-        assistant_message_content = "No response from assistant."
-        if messages.data:
-            assistant_message_content = messages.data[0].content[0].text.value
+        # The run already returns the assistant's reply from its stream, no need to
+        # list the thread messages again
+        assistant_message_content = response.get("message") or "No response from assistant."
         
-        # Save the assistant's response to the database
-        chat_service.create_message(
-            db,
-            chat_id=current_chat.id,
-            content=assistant_message_content,
-            role="assistant",
+        # Save the assistant's response to the database. The reply doesn't depend on
+        # the write, so the client gets it without waiting for the commit.
+        _save_message_in_background(
+            current_chat.id,
+            assistant_message_content,
+            "assistant",
             # Store structured company data if available from the run
-            metadata={"companies_found": response.get("companies", [])}
+            {"companies_found": response.get("companies", [])}
         )
 
         return {
@@ -531,11 +1419,17 @@ def handle_conversation_with_context(
         }
 
     except Exception as e:
-        print(f"❌ Error in conversation handling: {str(e)}")
+        logger.error("Error in conversation handling: %s", e)
         # This is a critical failure, so we return a structured error
         return {
             "error": "An unexpected error occurred while processing your request.",
             "details": str(e)
         }
 
-charity_assistant = CharityFundAssistant()
\ No newline at end of file
+@lru_cache()
+def get_charity_assistant() -> CharityFundAssistant:
+    """
+    Returns a process-wide CharityFundAssistant, created on first use so that
+    importing this module doesn't build the OpenAI client and its connection pool.
+    """
+    return CharityFundAssistant()
@@ -0,0 +1,195 @@
+"""
+Bulk sponsor discovery through the OpenAI Batch API
+
+For non-interactive workloads (e.g. refreshing many saved searches at once) the
+queries are not run through the assistant one by one. Instead the model turns each
+query into search criteria in a single Batch API job (24h completion window, about
+half the price of synchronous calls and a separate rate limit). Once the batch is
+done the criteria are run against the companies database.
+"""
+
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy.orm import Session
+
+from ..companies.service import CompanyService
+from ..core.database import SessionLocal
+from ..funds.models import DiscoveryBatch
+from .company_fields import format_company
+from .openai_client import get_openai_client, model_name, use_azure
+
+logger = logging.getLogger(__name__)
+
+# Batch states after which the output file no longer changes
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Companies stored per query
+BATCH_RESULT_LIMIT = 50
+
+CRITERIA_EXTRACTION_PROMPT = """
+You help a charity fund in Kazakhstan find potential corporate sponsors.
+Turn the user's request into search criteria for the companies database.
+Respond with a JSON object with exactly these keys:
+- "location": city or region name in Russian, or null
+- "activity_keywords": list of short keywords (in Russian) describing the industry, or null
+- "company_name": a specific company name if the user asked for one, or null
+"""
+
+
+def _batch_endpoint() -> str:
+    # Azure's batch endpoint has no version prefix
+    return "/chat/completions" if use_azure() else "/v1/chat/completions"
+
+
+def _batch_request_line(custom_id: str, query: str) -> bytes:
+    """One line of the batch input file: a chat completion extracting the criteria."""
+    return orjson.dumps({
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": _batch_endpoint(),
+        "body": {
+            "model": model_name(),
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": CRITERIA_EXTRACTION_PROMPT},
+                {"role": "user", "content": query},
+            ],
+        },
+    })
+
+
+async def create_batch_discovery(queries: List[str], db: Session, user_id: uuid.UUID) -> DiscoveryBatch:
+    """
+    Submits the queries as one Batch API job and records it for the user.
+    The custom_id of every request is the index of its query.
+    """
+    client = get_openai_client()
+    input_file = b"\n".join(_batch_request_line(str(index), query) for index, query in enumerate(queries))
+
+    uploaded = await client.files.create(file=("discovery.jsonl", input_file), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=_batch_endpoint(),
+        completion_window="24h",
+        metadata={"user_id": str(user_id)},
+    )
+    logger.info("Submitted discovery batch %s with %d queries", batch.id, len(queries))
+
+    def _save() -> DiscoveryBatch:
+        discovery_batch = DiscoveryBatch(user_id=user_id, batch_id=batch.id, status=batch.status, queries=queries)
+        db.add(discovery_batch)
+        db.commit()
+        db.refresh(discovery_batch)
+        return discovery_batch
+
+    return await asyncio.to_thread(_save)
+
+
+def _parse_criteria(output_line: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Search criteria from one line of the batch output, or None for a failed request."""
+    response = output_line.get("response") or {}
+    if not isinstance(response, dict):
+        return None
+    if output_line.get("error") or response.get("status_code") != 200:
+        return None
+    try:
+        content = response["body"]["choices"][0]["message"]["content"]
+        criteria = orjson.loads(content)
+    except (KeyError, IndexError, TypeError, orjson.JSONDecodeError):
+        return None
+    if not isinstance(criteria, dict):
+        return None
+
+    keywords = criteria.get("activity_keywords")
+    return {
+        "location": criteria.get("location") or None,
+        "activity_keywords": [str(keyword) for keyword in keywords] if isinstance(keywords, list) and keywords else None,
+        "company_name": criteria.get("company_name") or None,
+    }
+
+
+def _search_for_criteria(company_service: CompanyService, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
+    companies = company_service.search_companies(**criteria, limit=BATCH_RESULT_LIMIT, offset=0)
+    return [format_company(company_dict) for company_dict in companies]
+
+
+def _read_batch_output(batch_id: str, content: bytes) -> Dict[int, Optional[Dict[str, Any]]]:
+    """Search criteria per query index from the batch output file; malformed lines are skipped."""
+    criteria_by_index: Dict[int, Optional[Dict[str, Any]]] = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        try:
+            output_line = orjson.loads(line)
+            index = int(output_line["custom_id"])
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logger.warning("Skipping a malformed line in the output of batch %s: %s", batch_id, e)
+            continue
+        criteria_by_index[index] = _parse_criteria(output_line)
+    return criteria_by_index
+
+
+async def refresh_batch_discovery(discovery_batch: DiscoveryBatch, db: Session) -> DiscoveryBatch:
+    """
+    Updates the job's status from OpenAI. Once the batch is completed, its output is
+    downloaded, every query's criteria is run against the companies database and the
+    companies per query are stored; only the first refresh to finish stores them.
+    Finished jobs are returned as they are.
+    """
+    if discovery_batch.status in BATCH_FINAL_STATUSES:
+        return discovery_batch
+
+    client = get_openai_client()
+    batch = await client.batches.retrieve(discovery_batch.batch_id)
+
+    # Requests that failed are only listed in the error file, so their query simply
+    # has no criteria here
+    criteria_by_index: Optional[Dict[int, Optional[Dict[str, Any]]]] = None
+    if batch.status == "completed":
+        criteria_by_index = {}
+        if batch.output_file_id:
+            output = await client.files.content(batch.output_file_id)
+            criteria_by_index = _read_batch_output(batch.id, output.content)
+
+    def _hydrate() -> List[Dict[str, Any]]:
+        # Own session: CompanyService rolls back before each search, which would end
+        # the transaction (and release the row lock) of the request's session
+        search_db = SessionLocal()
+        try:
+            company_service = CompanyService(search_db)
+            results = []
+            for index, query in enumerate(discovery_batch.queries):
+                criteria = criteria_by_index.get(index)
+                results.append({
+                    "query": query,
+                    "search_criteria": criteria,
+                    "companies": _search_for_criteria(company_service, criteria) if criteria else [],
+                })
+            return results
+        finally:
+            search_db.close()
+
+    def _save(results: Optional[List[Dict[str, Any]]]) -> DiscoveryBatch:
+        # Row lock, held only for this short write: of several concurrent polls only
+        # the first one stores its results, the others see the final status and stop
+        locked = (
+            db.query(DiscoveryBatch)
+            .filter(DiscoveryBatch.id == discovery_batch.id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+        if locked.status not in BATCH_FINAL_STATUSES:
+            if results is not None:
+                locked.results = results
+            locked.status = batch.status
+        db.commit()
+        db.refresh(locked)
+        return locked
+
+    results = await asyncio.to_thread(_hydrate) if criteria_by_index is not None else None
+    return await asyncio.to_thread(_save, results)
@@ -0,0 +1,33 @@
+"""
+Company fields returned by the sponsor search
+
+The search_companies tool and batch sponsor discovery return the same subset of a
+CompanyService row, under the keys the frontend expects.
+"""
+
+from typing import Any, Dict, Tuple
+
+# (output key, CompanyService key) of the company fields returned by search_companies
+COMPANY_OUTPUT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("id", "id"),
+    ("name", "name"),
+    ("bin", "bin"),
+    ("activity", "activity"),
+    ("location", "locality"),
+    ("oked", "oked"),
+    ("size", "size"),
+    ("kato", "kato"),
+    ("krp", "krp"),
+    ("tax_data_2023", "tax_data_2023"),
+    ("tax_data_2024", "tax_data_2024"),
+    ("tax_data_2025", "tax_data_2025"),
+    ("contacts", "contacts"),
+    ("website", "website"),
+)
+COMPANY_OUTPUT_KEYS = tuple(output_key for output_key, _ in COMPANY_OUTPUT_FIELDS)
+COMPANY_SOURCE_KEYS = tuple(source_key for _, source_key in COMPANY_OUTPUT_FIELDS)
+
+
+def format_company(company_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Shapes a CompanyService row into the search output."""
+    return {output_key: company_dict.get(source_key) for output_key, source_key in COMPANY_OUTPUT_FIELDS}
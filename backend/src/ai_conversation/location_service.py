@@ -1,14 +1,37 @@
+import asyncio
 import json
-from functools import lru_cache
-from typing import Optional
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
 
 # Import the specific client and errors for robustness
-from openai import OpenAI, APIConnectionError, AuthenticationError, RateLimitError
+from openai import AsyncOpenAI, APIConnectionError, AuthenticationError, RateLimitError
 
 from ..core.config import get_settings
 
 # Use a global variable for a singleton client, initialized as None
-_client: Optional[OpenAI] = None
+_client: Optional[AsyncOpenAI] = None
+
+# In-process answers by normalized query, least recently used first
+LOCATION_MEMO_MAX_ENTRIES = 256
+_location_memo: "OrderedDict[str, Optional[str]]" = OrderedDict()
+# Lookups currently waiting for the model, so concurrent callers with the same
+# query share one request instead of each sending their own
+_location_in_flight: "Dict[str, asyncio.Task]" = {}
+
+# Model answers are also kept in a small SQLite file, so a restart doesn't send every
+# known query to OpenAI again. Pattern matches are cheap and are not stored there.
+# The default file is in the temp directory, which a new container starts without;
+# set LOCATION_CACHE_PATH to a persistent volume to keep the answers across deploys.
+LOCATION_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+_location_db: Optional[sqlite3.Connection] = None
+_location_db_lock = threading.Lock()
+_NOT_CACHED = object()
 
 # A constant for the prompt makes it easier to manage
 LOCATION_EXTRACTION_PROMPT = """
@@ -92,6 +115,8 @@ SIMPLE_CITY_PATTERNS = {
     "nur-sultan": "Астана",
     "астане": "Астана",
     "в астане": "Астана",
+    "астаны": "Астана",
+    "нур-султане": "Астана",
     # Шымкент variations
     "шымкент": "Шымкент",
     "shymkent": "Шымкент",
@@ -114,6 +139,8 @@ SIMPLE_CITY_PATTERNS = {
     # Семей variations
     "семей": "Семей",
     "semey": "Семей",
+    "семее": "Семей",
+    "семея": "Семей",
     "семипалатинск": "Семей",
     # Атырау variations
     "атырау": "Атырау",
@@ -122,6 +149,8 @@ SIMPLE_CITY_PATTERNS = {
     # Костанай variations
     "костанай": "Костанай",
     "kostanay": "Костанай",
+    "костанае": "Костанай",
+    "костаная": "Костанай",
     # Петропавл variations
     "петропавл": "Петропавл",
     "petropavl": "Петропавл",
@@ -129,6 +158,8 @@ SIMPLE_CITY_PATTERNS = {
     # Караганда variations
     "караганда": "Караганда",
     "karaganda": "Караганда",
+    "караганде": "Караганда",
+    "караганды": "Караганда",
     # Актау variations
     "актау": "Актау",
     "aktau": "Актау",
@@ -136,6 +167,8 @@ SIMPLE_CITY_PATTERNS = {
     # Кызылорда variations
     "кызылорда": "Кызылорда",
     "kyzylorda": "Кызылорда",
+    "кызылорде": "Кызылорда",
+    "кызылорды": "Кызылорда",
 }
 
 # Simple region patterns
@@ -236,6 +269,14 @@ SIMPLE_REGION_PATTERNS = {
     "области туркестан": "Туркестанская область",
 }
 
+# Regions are checked first, then cities, each in table order
+_SIMPLE_LOCATION_PATTERNS = tuple(SIMPLE_REGION_PATTERNS.items()) + tuple(SIMPLE_CITY_PATTERNS.items())
+# Matches if any of the patterns occurs in the text: one scan instead of a substring
+# test per pattern for texts without a known location (those go on to the model)
+_SIMPLE_LOCATION_RE = re.compile("|".join(
+    re.escape(pattern) for pattern in sorted(dict(_SIMPLE_LOCATION_PATTERNS), key=len, reverse=True)
+))
+
 def extract_location_simple(text: str) -> Optional[str]:
     """
     Simple fallback function to extract location without AI
@@ -244,22 +285,18 @@ def extract_location_simple(text: str) -> Optional[str]:
         return None
         
     text_lower = text.lower()
+    if not _SIMPLE_LOCATION_RE.search(text_lower):
+        return None
     
-    # Check for regions first
-    for pattern, canonical in SIMPLE_REGION_PATTERNS.items():
-        if pattern in text_lower:
-            return canonical
-    
-    # Check for cities
-    for pattern, canonical in SIMPLE_CITY_PATTERNS.items():
+    for pattern, canonical in _SIMPLE_LOCATION_PATTERNS:
         if pattern in text_lower:
             return canonical
     
     return None
 
-def get_client() -> OpenAI:
+def get_client() -> AsyncOpenAI:
     """
-    Safely initializes and returns a singleton OpenAI client.
+    Safely initializes and returns a singleton async OpenAI client.
     This "lazy initialization" prevents the app from crashing at startup if keys are missing.
     """
     global _client
@@ -271,14 +308,50 @@ def get_client() -> OpenAI:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not configured for the location service.")
         
-        _client = OpenAI(
+        _client = AsyncOpenAI(
             api_key=settings.OPENAI_API_KEY,
             timeout=15.0, # Add a timeout for network resilience
         )
     return _client
 
-@lru_cache(maxsize=256) # Increased cache size
-def get_canonical_location_from_text(text: str) -> Optional[str]:
+def _get_location_db() -> sqlite3.Connection:
+    """Opens (once) the SQLite file of persisted location answers."""
+    global _location_db
+    if _location_db is None:
+        path = get_settings().LOCATION_CACHE_PATH or os.path.join(tempfile.gettempdir(), "location_cache.sqlite3")
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS locations (query TEXT PRIMARY KEY, location TEXT, expires_at REAL NOT NULL)"
+        )
+        connection.commit()
+        _location_db = connection
+    return _location_db
+
+def _get_persisted_location(query: str):
+    """Returns the stored answer for a normalized query (None = no location), or _NOT_CACHED."""
+    try:
+        with _location_db_lock:
+            row = _get_location_db().execute(
+                "SELECT location FROM locations WHERE query = ? AND expires_at > ?", (query, time.time())
+            ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Location cache unavailable: {e}")
+        return _NOT_CACHED
+    return row[0] if row else _NOT_CACHED
+
+def _persist_location(query: str, location: Optional[str]) -> None:
+    try:
+        with _location_db_lock:
+            connection = _get_location_db()
+            connection.execute(
+                "INSERT OR REPLACE INTO locations (query, location, expires_at) VALUES (?, ?, ?)",
+                (query, location, time.time() + LOCATION_CACHE_TTL_SECONDS)
+            )
+            connection.commit()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ Could not store location in cache: {e}")
+
+async def get_canonical_location_from_text(text: str) -> Optional[str]:
     """
     Uses OpenAI to extract the canonical city name from a user's query.
     Results are cached, and specific API errors are handled gracefully.
@@ -287,19 +360,51 @@ def get_canonical_location_from_text(text: str) -> Optional[str]:
     if not text.strip():
         return None
 
+    # Case and spacing don't change the answer, so they don't split the cache either
+    query = " ".join(text.lower().split())
+    if query in _location_memo:
+        _location_memo.move_to_end(query)
+        return _location_memo[query]
+
+    task = _location_in_flight.get(query)
+    if task is None:
+        task = asyncio.ensure_future(_get_canonical_location(query))
+        _location_in_flight[query] = task
+        task.add_done_callback(lambda _: _location_in_flight.pop(query, None))
+    location = await asyncio.shield(task)
+    if location is not _NOT_CACHED:
+        _location_memo[query] = location
+        while len(_location_memo) > LOCATION_MEMO_MAX_ENTRIES:
+            _location_memo.popitem(last=False)
+        return location
+
+    # The model was unavailable (the patterns had already missed). Not remembered,
+    # so the query is tried again once the API is back.
+    return None
+
+async def _get_canonical_location(text: str):
+    """
+    Location for a normalized (lower-cased, single-spaced) query, or _NOT_CACHED if
+    the model could not be asked.
+    """
     # First try simple pattern matching as fallback
     simple_result = extract_location_simple(text)
     if simple_result:
         print(f"✅ Found location using simple pattern matching: '{simple_result}'")
         return simple_result
 
+    # SQLite calls block, so they run in a worker thread rather than on the event loop
+    persisted = await asyncio.to_thread(_get_persisted_location, text)
+    if persisted is not _NOT_CACHED:
+        return persisted
+
     try:
         # This will log only when the API is actually called (not a cache hit)
         print(f"🧠 Calling OpenAI API for location extraction: '{text[:50]}...'")
         
         settings = get_settings()
         client = get_client()
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=settings.OPENAI_MODEL_NAME,
             messages=[
                 {"role": "system", "content": LOCATION_EXTRACTION_PROMPT},
@@ -309,37 +414,20 @@ def get_canonical_location_from_text(text: str) -> Optional[str]:
             max_tokens=20
         )
         
-        location = response.choices[0].message.content.strip()
+        # The prompt's examples quote their answers, and the model sometimes copies that
+        location = (response.choices[0].message.content or "").strip().strip('"«»\'.').strip()
 
         if location.lower() == "null" or not location:
-            return None
+            location = None
         
+        await asyncio.to_thread(_persist_location, text, location)
         return location
 
     except (APIConnectionError, RateLimitError) as e:
         print(f"❌ OpenAI network/rate limit error in location service: {e}")
-        print(f"🔄 Falling back to simple pattern matching for: '{text[:50]}...'")
-        # Try simple pattern matching as fallback
-        fallback_result = extract_location_simple(text)
-        if fallback_result:
-            print(f"✅ Fallback successful: '{fallback_result}'")
-            return fallback_result
-        return None # Fail gracefully on temporary issues
     except AuthenticationError as e:
         print(f"❌ OpenAI authentication error in location service. Check API Key. Error: {e}")
-        print(f"🔄 Falling back to simple pattern matching for: '{text[:50]}...'")
-        # Try simple pattern matching as fallback
-        fallback_result = extract_location_simple(text)
-        if fallback_result:
-            print(f"✅ Fallback successful: '{fallback_result}'")
-            return fallback_result
-        return None
     except Exception as e:
         print(f"❌ An unexpected error occurred in location service: {e}")
-        print(f"🔄 Falling back to simple pattern matching for: '{text[:50]}...'")
-        # Try simple pattern matching as fallback
-        fallback_result = extract_location_simple(text)
-        if fallback_result:
-            print(f"✅ Fallback successful: '{fallback_result}'")
-            return fallback_result
-        return None 
\ No newline at end of file
+
+    return _NOT_CACHED
@@ -0,0 +1,75 @@
+"""
+Shared OpenAI client for the AI conversation features
+
+One async OpenAI (or Azure OpenAI) client and HTTP connection pool for the whole
+process, used by the charity fund assistant and by batch sponsor discovery.
+"""
+
+import threading
+from typing import Optional
+
+import httpx
+from openai import AsyncAzureOpenAI, AsyncOpenAI
+
+from ..core.config import get_settings
+
+# Settings are fixed for the life of the process (get_settings is lru_cached)
+_SETTINGS = get_settings()
+
+# One OpenAI client (and HTTP connection pool) for the whole process. A
+# CharityFundAssistant is built per request, and a client per instance would open
+# a new TLS connection to the API for every conversation turn.
+_OPENAI_CLIENT: Optional[AsyncOpenAI] = None
+_OPENAI_CLIENT_LOCK = threading.Lock()
+
+
+def use_azure() -> bool:
+    """Azure OpenAI is used when its endpoint and key are configured."""
+    return bool(_SETTINGS.AZURE_OPENAI_ENDPOINT and _SETTINGS.AZURE_OPENAI_KEY)
+
+
+def model_name() -> str:
+    """Model (or, on Azure, deployment) the assistant runs on."""
+    if use_azure():
+        return _SETTINGS.AZURE_OPENAI_DEPLOYMENT_NAME or _SETTINGS.OPENAI_MODEL_NAME
+    return _SETTINGS.OPENAI_MODEL_NAME
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Returns the shared async OpenAI (or Azure OpenAI) client, creating it on first use."""
+    global _OPENAI_CLIENT
+    with _OPENAI_CLIENT_LOCK:
+        if _OPENAI_CLIENT is None:
+            # HTTP/2 multiplexes concurrent requests (runs, streams, tool outputs) over a
+            # few kept-alive connections. The transport also retries failed connects.
+            http_client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    http2=True,
+                    retries=2,
+                    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=60),
+                )
+            )
+            if use_azure():
+                _OPENAI_CLIENT = AsyncAzureOpenAI(
+                    api_key=_SETTINGS.AZURE_OPENAI_KEY,
+                    azure_endpoint=_SETTINGS.AZURE_OPENAI_ENDPOINT,
+                    api_version=_SETTINGS.AZURE_OPENAI_API_VERSION,
+                    http_client=http_client,
+                    timeout=60,
+                )
+            else:
+                _OPENAI_CLIENT = AsyncOpenAI(
+                    api_key=_SETTINGS.OPENAI_API_KEY,
+                    http_client=http_client,
+                    # The SDK default is 10 minutes; runs pass their own OPENAI_RUN_TIMEOUT_SECONDS
+                    timeout=60,
+                )
+        return _OPENAI_CLIENT
+
+
+async def close_openai_client() -> None:
+    """Closes the shared OpenAI client and its connection pool (on app shutdown)."""
+    global _OPENAI_CLIENT
+    client, _OPENAI_CLIENT = _OPENAI_CLIENT, None
+    if client is not None:
+        await client.close()
@@ -15,7 +15,8 @@ from dotenv import load_dotenv
 
 from .models import ChatRequest, ChatResponse, CompanyCharityRequest, CompanyCharityResponse, GoogleSearchResult
 # !!! ИМПОРТИРУЕМ НАШ ГЛАВНЫЙ СЕРВИС !!!
-from .service import ai_service
+from .service import ai_service, GOOGLE_CUSTOM_SEARCH_URL
+from .assistant_creator import wait_for_chat_message_writes
 from ..core.database import get_db
 from ..auth.models import User
 from ..auth.dependencies import get_current_user
@@ -80,6 +81,25 @@ if not GOOGLE_SEARCH_ENGINE_ID:
 if not GEMINI_API_KEY:
     print("⚠️  Warning: GEMINI_API_KEY is not set. The API key rotator will not work properly.")
 
+# Ключевые слова фильтра результатов /charity-research, общие для всех запросов
+# Расширенные ключевые слова для определения релевантности благотворительности
+CHARITY_KEYWORDS = (
+    'благотворительность', 'благотворительный', 'фонд', 'помощь', 'поддержка',
+    'финансирует', 'спонсирует', 'программа', 'проект', 'инициатива',
+    'социальная ответственность', 'КСО', 'CSR', 'образование', 'здравоохранение',
+    'charity', 'charitable', 'foundation', 'donates', 'sponsors', 'supports',
+    'initiative', 'program', 'social responsibility', 'волонтерство', 'экология',
+    'культура', 'спорт', 'медицина', 'университет', 'школа', 'детский сад',
+    'инвалиды', 'малообеспеченные', 'пенсионеры', 'ветераны', 'корпоративная социальная ответственность'
+)
+
+# Исключающие ключевые слова (чтобы отфильтровать нерелевантные результаты)
+CHARITY_EXCLUDE_KEYWORDS = (
+    'вакансия', 'работа', 'новости', 'реклама', 'продажа', 'услуги',
+    'vacancy', 'job', 'news', 'advertisement', 'sale', 'services',
+    'купить', 'цена', 'стоимость', 'прайс'
+)
+
 
 # ============================================================================== 
 # === НОВЫЙ, ПРАВИЛЬНЫЙ ЭНДПОИНТ ДЛЯ ПОИСКА КОМПАНИЙ ЧЕРЕЗ БД ===
@@ -174,6 +194,9 @@ async def get_chat_history_for_ai(
         # Проверяем формат UUID
         chat_uuid = uuid.UUID(chat_id)
         
+        # Последний ответ ассистента сохраняется в фоне, дожидаемся его записи
+        await wait_for_chat_message_writes(chat_uuid)
+
         # Загружаем историю используя AI service
         history = ai_service._load_chat_history_from_db(db, chat_uuid)
         
@@ -248,104 +271,96 @@ async def get_company_charity_info(
 
     all_search_results: List[GoogleSearchResult] = []
     
-    # Расширенные ключевые слова для определения релевантности благотворительности
-    charity_keywords = [
-        'благотворительность', 'благотворительный', 'фонд', 'помощь', 'поддержка',
-        'финансирует', 'спонсирует', 'программа', 'проект', 'инициатива',
-        'социальная ответственность', 'КСО', 'CSR', 'образование', 'здравоохранение',
-        'charity', 'charitable', 'foundation', 'donates', 'sponsors', 'supports',
-        'initiative', 'program', 'social responsibility', 'волонтерство', 'экология',
-        'культура', 'спорт', 'медицина', 'университет', 'школа', 'детский сад',
-        'инвалиды', 'малообеспеченные', 'пенсионеры', 'ветераны', 'корпоративная социальная ответственность'
-    ]
+    # Варианты названия компании строятся один раз на запрос, а не для каждого результата поиска
+    company_name_lower = company_name.lower()
+    company_name_variants = tuple(dict.fromkeys((
+        company_name_lower,
+        company_name_lower.replace('"', ''),  # без кавычек
+        company_name_lower.replace('ао ', '').replace('тоо ', '').replace('оао ', ''),  # без правовых форм
+    )))
     
-    # Исключающие ключевые слова (чтобы отфильтровать нерелевантные результаты)
-    exclude_keywords = [
-        'вакансия', 'работа', 'новости', 'реклама', 'продажа', 'услуги',
-        'vacancy', 'job', 'news', 'advertisement', 'sale', 'services',
-        'купить', 'цена', 'стоимость', 'прайс'
-    ]
-    
-    # Использование httpx.AsyncClient для асинхронных запросов
+    async def _fetch_search_data(client: httpx.AsyncClient, i: int, query: str) -> dict:
+        print(f"🔍 [CHARITY_RESEARCH] Выполняю запрос {i+1}/{len(search_queries)}: '{query[:80]}...'")
+        
+        # Параметры кодирует httpx, поэтому кавычки и "&" в названии компании не ломают запрос
+        search_params = {
+            "key": GOOGLE_API_KEY,
+            "cx": GOOGLE_SEARCH_ENGINE_ID,
+            "q": query,
+            "num": 10,  # Увеличиваем результаты на запрос (компенсируем меньшее кол-во запросов)
+            "lr": "lang_ru",  # Предпочтение русскому языку
+            "gl": "kz",  # Географическое ограничение - Казахстан
+        }
+        response = await client.get(GOOGLE_CUSTOM_SEARCH_URL, params=search_params)
+        response.raise_for_status()
+        return response.json()
+
+    # Использование httpx.AsyncClient для асинхронных запросов.
+    # Запросы независимы, поэтому выполняются одновременно, а не друг за другом.
     timeout = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
     async with httpx.AsyncClient(timeout=timeout) as client:
-        for i, query in enumerate(search_queries):
-            print(f"🔍 [CHARITY_RESEARCH] Выполняю запрос {i+1}/{len(search_queries)}: '{query[:80]}...'")
-            
-            search_url = (
-                f"https://www.googleapis.com/customsearch/v1?"
-                f"key={GOOGLE_API_KEY}&"
-                f"cx={GOOGLE_SEARCH_ENGINE_ID}&"
-                f"q={query}&"
-                f"num=10&"  # Увеличиваем результаты на запрос (компенсируем меньшее кол-во запросов)
-                f"lr=lang_ru&"  # Предпочтение русскому языку
-                f"gl=kz"  # Географическое ограничение - Казахстан
-            )
+        search_responses = await asyncio.gather(
+            *(_fetch_search_data(client, i, query) for i, query in enumerate(search_queries)),
+            return_exceptions=True
+        )
 
-            try:
-                response = await client.get(search_url)
-                response.raise_for_status()
-                search_data = response.json()
-                
-                found_relevant = 0
-                total_found = len(search_data.get('items', []))
-
-                if 'items' in search_data:
-                    for item in search_data['items']:
-                        title = item.get('title', '').lower()
-                        snippet = item.get('snippet', '').lower()
-                        link = item.get('link', '')
-                        full_text = f"{title} {snippet}"
-                        
-                        # 🎯 СТРОГАЯ ФИЛЬТРАЦИЯ: Проверяем что есть и название компании, и ключевые слова
-                        company_name_variants = [
-                            company_name.lower(),
-                            company_name.lower().replace('"', ''),  # без кавычек
-                            company_name.lower().replace('ао ', '').replace('тоо ', '').replace('оао ', ''),  # без правовых форм
-                        ]
-                        
-                        # Проверяем наличие названия компании в результате
-                        has_company_name = any(variant in full_text for variant in company_name_variants)
-                        
-                        # Проверяем релевантность результата (наличие благотворительных ключевых слов)
-                        is_charity_relevant = any(keyword in full_text for keyword in charity_keywords)
-                        
-                        # Проверяем отсутствие исключающих слов (шум)
-                        has_exclude_keywords = any(exclude in full_text for exclude in exclude_keywords)
-                        
-                        # 🔍 ГИБКИЕ КРИТЕРИИ: результат принимается если:
-                        # 1. Есть название компании И 2. Есть ключевые слова благотворительности
-                        # Исключающие слова не блокируют полностью, а только снижают приоритет
-                        if has_company_name and is_charity_relevant:
-                            all_search_results.append(GoogleSearchResult(
-                                title=item.get('title', 'Нет заголовка'),
-                                link=link,
-                                snippet=item.get('snippet', 'Нет описания')
-                            ))
-                            found_relevant += 1
-                            print(f"✅ [CHARITY_RESEARCH] Строгий фильтр ПРОЙДЕН: {item.get('title', '')[:50]}...")
-                        else:
-                            # Детальное логирование причин отклонения
-                            reasons = []
-                            if not has_company_name:
-                                reasons.append("нет названия компании")
-                            if not is_charity_relevant:
-                                reasons.append("нет ключевых слов")
-                            if has_exclude_keywords:
-                                reasons.append("есть исключающие слова")
-                            print(f"🚫 [CHARITY_RESEARCH] Строгий фильтр НЕ ПРОЙДЕН ({', '.join(reasons)}): {item.get('title', '')[:50]}...")
-                
-                print(f"📊 [CHARITY_RESEARCH] Запрос {i+1}: найдено {total_found}, релевантных {found_relevant}")
-                
-                # Задержка между запросами (теперь максимум 2 запроса)
-                if i < len(search_queries) - 1:  # Не ждем после последнего запроса
-                    await asyncio.sleep(1.0)  # Немного увеличиваем задержку для стабильности
-                
-            except httpx.RequestError as e:
-                print(f"❌ [CHARITY_RESEARCH] Ошибка HTTP для запроса '{query[:50]}...': {e}")
-            except Exception as e:
-                print(f"❌ [CHARITY_RESEARCH] Неизвестная ошибка для запроса '{query[:50]}...': {e}")
-                traceback.print_exc()
+    # Результаты обрабатываются в порядке запросов
+    for i, (query, search_data) in enumerate(zip(search_queries, search_responses)):
+        if isinstance(search_data, httpx.RequestError):
+            print(f"❌ [CHARITY_RESEARCH] Ошибка HTTP для запроса '{query[:50]}...': {search_data}")
+            continue
+        if isinstance(search_data, Exception):
+            print(f"❌ [CHARITY_RESEARCH] Неизвестная ошибка для запроса '{query[:50]}...': {search_data}")
+            traceback.print_exception(search_data)
+            continue
+
+        try:
+            found_relevant = 0
+            total_found = len(search_data.get('items', []))
+
+            if 'items' in search_data:
+                for item in search_data['items']:
+                    title = item.get('title', '').lower()
+                    snippet = item.get('snippet', '').lower()
+                    link = item.get('link', '')
+                    full_text = f"{title} {snippet}"
+                    
+                    # 🎯 СТРОГАЯ ФИЛЬТРАЦИЯ: Проверяем что есть и название компании, и ключевые слова
+                    # Проверяем наличие названия компании в результате
+                    has_company_name = any(variant in full_text for variant in company_name_variants)
+                    
+                    # Проверяем релевантность результата (наличие благотворительных ключевых слов)
+                    is_charity_relevant = any(keyword in full_text for keyword in CHARITY_KEYWORDS)
+                    
+                    # Проверяем отсутствие исключающих слов (шум)
+                    has_exclude_keywords = any(exclude in full_text for exclude in CHARITY_EXCLUDE_KEYWORDS)
+                    
+                    # 🔍 ГИБКИЕ КРИТЕРИИ: результат принимается если:
+                    # 1. Есть название компании И 2. Есть ключевые слова благотворительности
+                    # Исключающие слова не блокируют полностью, а только снижают приоритет
+                    if has_company_name and is_charity_relevant:
+                        all_search_results.append(GoogleSearchResult(
+                            title=item.get('title', 'Нет заголовка'),
+                            link=link,
+                            snippet=item.get('snippet', 'Нет описания')
+                        ))
+                        found_relevant += 1
+                        print(f"✅ [CHARITY_RESEARCH] Строгий фильтр ПРОЙДЕН: {item.get('title', '')[:50]}...")
+                    else:
+                        # Детальное логирование причин отклонения
+                        reasons = []
+                        if not has_company_name:
+                            reasons.append("нет названия компании")
+                        if not is_charity_relevant:
+                            reasons.append("нет ключевых слов")
+                        if has_exclude_keywords:
+                            reasons.append("есть исключающие слова")
+                        print(f"🚫 [CHARITY_RESEARCH] Строгий фильтр НЕ ПРОЙДЕН ({', '.join(reasons)}): {item.get('title', '')[:50]}...")
+            
+            print(f"📊 [CHARITY_RESEARCH] Запрос {i+1}: найдено {total_found}, релевантных {found_relevant}")
+        except Exception as e:
+            print(f"❌ [CHARITY_RESEARCH] Неизвестная ошибка для запроса '{query[:50]}...': {e}")
+            traceback.print_exc()
 
     # 🎯 ГИБКАЯ ГЕНЕРАЦИЯ СВОДКИ: анализируем все найденные материалы
     if not all_search_results:
@@ -0,0 +1,135 @@
+"""
+Semantic response cache for the charity fund assistant
+
+Remembers the assistant's answer to the opening question of a chat, keyed by the
+embedding of that question. A new chat that opens with (nearly) the same question
+gets the stored answer without an assistant run. Follow-up messages are never
+looked up here, since their answer depends on the thread's context.
+
+Embeddings of questions that differ only in a city or an industry are close
+together, so similarity alone is not enough: every entry has a scope (the user and
+the entities extracted from the question) and is only compared with lookups of
+the same scope.
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .location_service import extract_location_simple
+
+logger = logging.getLogger(__name__)
+
+# Size of the stored vectors; text-embedding-3-* models can shorten their output,
+# which keeps the linear scan over the entries cheap. Older models (e.g.
+# text-embedding-ada-002) reject the parameter and return their full size.
+EMBEDDING_DIMENSIONS = 256
+
+# Request wording that doesn't change what is being searched for
+_QUESTION_FILLER_WORDS = frozenset({
+    "в", "во", "на", "по", "из", "для", "с", "и", "или", "мне", "нам", "пожалуйста",
+    "найди", "найдите", "найти", "покажи", "покажите", "дай", "дайте", "нужны", "нужно",
+    "ищу", "хочу", "какие", "есть", "компании", "компаний", "компанию", "компания",
+    "спонсоров", "спонсоры", "спонсора", "please", "find", "show", "me", "give",
+    "i", "need", "want", "looking", "for", "in", "the", "a", "an", "of", "some",
+    "companies", "company", "sponsors", "sponsor",
+})
+
+
+def question_scope(user_id: Any, question: str) -> Tuple[Any, Optional[str], frozenset]:
+    """
+    Scope of a cached answer: the user, the location found in the question and the
+    remaining search terms (words other than request filler, cut to a 5-letter stem so
+    simple inflections still match). Answers are only shared between questions that
+    agree on all three.
+    """
+    normalized = unicodedata.normalize("NFKC", question).lower()
+    terms = frozenset(
+        word[:5] for word in re.findall(r"\w+", normalized)
+        if word not in _QUESTION_FILLER_WORDS
+    )
+    return user_id, extract_location_simple(normalized), terms
+
+
+class SemanticCache:
+    """
+    In-process cache of (scope, question embedding -> assistant response). Lookups
+    are an exact cosine-similarity scan over the entries of the same scope.
+    """
+
+    def __init__(self, threshold: float, ttl_seconds: int, max_entries: int = 512):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (expires_at, scope, unit vector, cached response), oldest first
+        self._entries: List[Tuple[float, Hashable, List[float], Dict[str, Any]]] = []
+        # Embeddings of recent questions by their normalized text, so a repeated
+        # question doesn't need another embeddings request
+        self._embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def embed(self, client, model: str, text: str) -> Optional[List[float]]:
+        """
+        Returns the normalized embedding of `text`, or None if the embeddings call
+        fails (the caller then just runs the assistant as usual).
+        """
+        text_key = " ".join(unicodedata.normalize("NFKC", text).lower().split())
+        with self._lock:
+            embedding = self._embeddings.get(text_key)
+            if embedding is not None:
+                self._embeddings.move_to_end(text_key)
+                return embedding
+
+        options: Dict[str, Any] = {}
+        if "text-embedding-3" in model:
+            options["dimensions"] = EMBEDDING_DIMENSIONS
+        try:
+            result = await client.embeddings.create(model=model, input=text.strip(), **options)
+        except Exception as e:
+            logger.warning("Semantic cache: embedding failed, skipping the cache: %s", e)
+            return None
+
+        vector = result.data[0].embedding
+        norm = math.sqrt(sum(x * x for x in vector))
+        if not norm:
+            return None
+        embedding = [x / norm for x in vector]
+
+        with self._lock:
+            self._embeddings[text_key] = embedding
+            while len(self._embeddings) > self.max_entries:
+                self._embeddings.popitem(last=False)
+        return embedding
+
+    def lookup(self, embedding: List[float], scope: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached response of `scope` closest to `embedding` if it clears the
+        threshold.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._entries = [entry for entry in self._entries if entry[0] > now]
+            best_score, best_response = 0.0, None
+            for _, entry_scope, vector, response in self._entries:
+                if entry_scope != scope:
+                    continue
+                score = sum(a * b for a, b in zip(vector, embedding))
+                if score > best_score:
+                    best_score, best_response = score, response
+
+        if best_response is not None and best_score >= self.threshold:
+            logger.debug("Semantic cache hit (similarity %.3f)", best_score)
+            return best_response
+        return None
+
+    def store(self, embedding: List[float], response: Dict[str, Any], scope: Hashable) -> None:
+        """Caches `response` for `embedding` in `scope`, evicting the oldest entry when full."""
+        with self._lock:
+            self._entries.append((time.monotonic() + self.ttl_seconds, scope, embedding, response))
+            if len(self._entries) > self.max_entries:
+                del self._entries[0]
@@ -316,6 +316,29 @@ CHARITY_SUMMARY_PROMPT_TEMPLATE = """
 Если информации недостаточно, структурированно объясни, что именно не найдено и как можно получить дополнительную информацию.
 """
 
+GOOGLE_CUSTOM_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+
+# Индикаторы для фильтрации результатов веб-поиска (_is_charity_relevant).
+# Собираются один раз при загрузке модуля, а не при проверке каждого результата.
+# Расширенные позитивные индикаторы благотворительности
+CHARITY_POSITIVE_INDICATORS = (
+    "благотворительность", "пожертвование", "спонсорство", "помощь", 
+    "поддержка", "фонд", "социальная ответственность", "CSR", "КСО",
+    "детский дом", "больница", "образование", "стипендия",
+    "волонтер", "донор", "меценат", "гранты", "социальный проект",
+    "корпоративная социальная ответственность", "экология", "культура",
+    "спорт", "медицина", "университет", "школа", "детский сад",
+    "инвалиды", "малообеспеченные", "пенсионеры", "ветераны"
+)
+
+# Негативные индикаторы (спам, реклама, не благотворительность)
+CHARITY_NEGATIVE_INDICATORS = (
+    "купить", "скидка", "цена", "товар", "услуга", "продажа",
+    "реклама", "заказать", "доставка", "магазин", "каталог",
+    "вакансия", "работа", "резюме", "сотрудник", "зарплата",
+    "отзыв", "жалоба", "скандал", "коррупция", "штраф"
+)
+
 class GeminiService:
     def __init__(self):
         self.settings = get_settings()
@@ -406,7 +429,7 @@ class GeminiService:
             traceback.print_exc()
             db.rollback()
 
-    def _parse_intent_fallback(self, user_input: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+    async def _parse_intent_fallback(self, user_input: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
         """
         Fallback intent parsing using simple pattern matching when Gemini API is unavailable.
         
@@ -421,7 +444,7 @@ class GeminiService:
         print(f"🔄 [FALLBACK_PARSER] Using fallback parsing for: {user_input}")
         
         # Extract location using the existing location service
-        location = get_canonical_location_from_text(user_input)
+        location = await get_canonical_location_from_text(user_input)
         
         # Simple quantity extraction
         quantity = 10  # default
@@ -557,7 +580,7 @@ class GeminiService:
                                 else:
                                     print(f"🔄 [GEMINI_PARSER] All API keys failed for 429 error, using fallback parsing")
                                     user_input = history[-1]["content"] if history else ""
-                                    return self._parse_intent_fallback(user_input, history)
+                                    return await self._parse_intent_fallback(user_input, history)
                         
                         # Handle service unavailable
                         if response.status_code == 503:
@@ -574,7 +597,7 @@ class GeminiService:
                                 else:
                                     print(f"🔄 [GEMINI_PARSER] All API keys failed for 503 error, using fallback parsing")
                                     user_input = history[-1]["content"] if history else ""
-                                    return self._parse_intent_fallback(user_input, history)
+                                    return await self._parse_intent_fallback(user_input, history)
                         
                         # Handle quota exceeded
                         if response.status_code == 403:
@@ -585,7 +608,7 @@ class GeminiService:
                             else:
                                 print(f"🔄 [GEMINI_PARSER] All API keys quota exceeded, using fallback parsing")
                                 user_input = history[-1]["content"] if history else ""
-                                return self._parse_intent_fallback(user_input, history)
+                                return await self._parse_intent_fallback(user_input, history)
                         
                         response.raise_for_status()
                         
@@ -617,7 +640,7 @@ class GeminiService:
                         else:
                             print(f"🔄 [GEMINI_PARSER] Using fallback parsing due to HTTP error: {e.response.status_code}")
                             user_input = history[-1]["content"] if history else ""
-                            return self._parse_intent_fallback(user_input, history)
+                            return await self._parse_intent_fallback(user_input, history)
                 except Exception as e:
                     if attempt < max_retries_per_key - 1:
                         delay = base_delay * (2 ** attempt)
@@ -634,7 +657,7 @@ class GeminiService:
                             traceback.print_exc()
                             # Use fallback parsing when Gemini is unavailable
                             user_input = history[-1]["content"] if history else ""
-                            return self._parse_intent_fallback(user_input, history)
+                            return await self._parse_intent_fallback(user_input, history)
 
     def _generate_summary_response(self, history: List[Dict[str, str]], companies_data: List[Dict[str, Any]]) -> str:
         """Craft a summary response based on found companies."""
@@ -862,89 +885,38 @@ class GeminiService:
 
         queries_to_execute = [query_1, query_2, query_3]
         
-        search_results_text = ""
+        search_result_blocks: List[str] = []
         unique_links = set()
         max_results_per_query = 3  # Ограничиваем для концентрации на качестве
 
+        # Запросы независимы друг от друга, поэтому выполняются одновременно:
+        # общее время поиска равно самому долгому запросу, а не их сумме
         timeout = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
         async with httpx.AsyncClient(timeout=timeout) as client:
-            for i, query in enumerate(queries_to_execute, 1):
-                search_url = f"https://www.googleapis.com/customsearch/v1?key={self.settings.GOOGLE_API_KEY}&cx={self.settings.GOOGLE_SEARCH_ENGINE_ID}&q={query}&num={max_results_per_query}&lr=lang_ru"
-                print(f"   -> Executing strategic query {i}/2: {query}")
-                
-                # Retry logic for Google API calls
-                max_retries = 2
-                base_delay = 2.0
-                
-                for attempt in range(max_retries):
-                    try:
-                        response = await client.get(search_url)
-                        
-                        # Handle rate limiting
-                        if response.status_code == 429:
-                            retry_after = int(response.headers.get('Retry-After', base_delay * (2 ** attempt)))
-                            print(f"⚠️ [GOOGLE_RATE_LIMIT] Query {i}, attempt {attempt + 1}: Rate limited, waiting {retry_after}s")
-                            if attempt < max_retries - 1:
-                                await asyncio.sleep(retry_after)
-                                continue
-                            else:
-                                print(f"❌ [WEB_RESEARCH] Rate limit reached. Stopping search.")
-                                break
-                        
-                        # Handle service unavailable
-                        if response.status_code == 503:
-                            delay = base_delay * (2 ** attempt)
-                            print(f"⚠️ [GOOGLE_SERVICE_UNAVAILABLE] Query {i}, attempt {attempt + 1}: Service unavailable, waiting {delay}s")
-                            if attempt < max_retries - 1:
-                                await asyncio.sleep(delay)
-                                continue
-                            else:
-                                print(f"❌ [WEB_RESEARCH] Service unavailable. Stopping search.")
-                                break
-                        
-                        response.raise_for_status()
-                        data = response.json()
-
-                        if 'items' in data:
-                            for item in data['items']:
-                                link = item.get('link')
-                                title = item.get('title', '')
-                                snippet = item.get('snippet', '')
-                                
-                                # Фильтруем результаты на релевантность
-                                if link and link not in unique_links and self._is_charity_relevant(title, snippet):
-                                    unique_links.add(link)
-                                    search_results_text += f"📄 Источник:\n"
-                                    search_results_text += f"Заголовок: {title}\n"
-                                    search_results_text += f"Описание: {snippet}\n"
-                                    search_results_text += f"Ссылка: {link}\n\n"
-                        
-                        # Success, break retry loop
-                        break
-                        
-                    except httpx.HTTPStatusError as e:
-                        if e.response.status_code in [429, 503] and attempt < max_retries - 1:
-                            delay = base_delay * (2 ** attempt)
-                            print(f"⚠️ [GOOGLE_HTTP_ERROR] Query {i}, attempt {attempt + 1}: {e.response.status_code}, waiting {delay}s")
-                            await asyncio.sleep(delay)
-                            continue
-                        else:
-                            print(f"⚠️ [WEB_RESEARCH] HTTP error for query {i}: {e}")
-                            break
-                    except Exception as e:
-                        if attempt < max_retries - 1:
-                            delay = base_delay * (2 ** attempt)
-                            print(f"⚠️ [GOOGLE_ERROR] Query {i}, attempt {attempt + 1}: {e}, waiting {delay}s")
-                            await asyncio.sleep(delay)
-                            continue
-                        else:
-                            print(f"⚠️ [WEB_RESEARCH] Error for query {i}: {e}")
-                            traceback.print_exc()
-                            break
+            items_per_query = await asyncio.gather(*(
+                self._fetch_charity_search_items(client, i, query, max_results_per_query)
+                for i, query in enumerate(queries_to_execute, 1)
+            ))
+
+        # Результаты обрабатываются в порядке запросов, как и при последовательном поиске
+        for items in items_per_query:
+            for item in items:
+                link = item.get('link')
+                title = item.get('title', '')
+                snippet = item.get('snippet', '')
                 
-                # Задержка между запросами (теперь максимум 2 запроса)
-                if i < len(queries_to_execute) - 1:  # Не ждем после последнего запроса
-                    await asyncio.sleep(2.0)  # Увеличиваем задержку для стабильности
+                # Фильтруем результаты на релевантность
+                if link and link not in unique_links and self._is_charity_relevant(title, snippet):
+                    unique_links.add(link)
+                    search_result_blocks.append(
+                        f"📄 Источник:\n"
+                        f"Заголовок: {title}\n"
+                        f"Описание: {snippet}\n"
+                        f"Ссылка: {link}\n\n"
+                    )
+
+        # Блоки собираются в список и склеиваются один раз, без повторного копирования строки
+        search_results_text = "".join(search_result_blocks)
 
         # Если ничего релевантного не найдено
         if not search_results_text.strip():
@@ -1014,6 +986,82 @@ class GeminiService:
                     traceback.print_exc()
                     return f"Найдена информация о возможной благотворительной деятельности компании '{company_name}', но не удалось обработать данные из-за технической ошибки. Попробуйте позже."
 
+    async def _fetch_charity_search_items(
+        self,
+        client: httpx.AsyncClient,
+        i: int,
+        query: str,
+        max_results: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Выполняет один запрос Google Custom Search (с повторами при 429/503)
+        и возвращает найденные элементы; при ошибке возвращает пустой список.
+        """
+        # httpx кодирует параметры сам: кириллица, кавычки и "&" в названии компании
+        # не ломают строку запроса
+        search_params = {
+            "key": self.settings.GOOGLE_API_KEY,
+            "cx": self.settings.GOOGLE_SEARCH_ENGINE_ID,
+            "q": query,
+            "num": max_results,
+            "lr": "lang_ru",
+        }
+        print(f"   -> Executing strategic query {i}: {query}")
+        
+        # Retry logic for Google API calls
+        max_retries = 2
+        base_delay = 2.0
+        
+        for attempt in range(max_retries):
+            try:
+                response = await client.get(GOOGLE_CUSTOM_SEARCH_URL, params=search_params)
+                
+                # Handle rate limiting
+                if response.status_code == 429:
+                    retry_after = int(response.headers.get('Retry-After', base_delay * (2 ** attempt)))
+                    print(f"⚠️ [GOOGLE_RATE_LIMIT] Query {i}, attempt {attempt + 1}: Rate limited, waiting {retry_after}s")
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(retry_after)
+                        continue
+                    else:
+                        print(f"❌ [WEB_RESEARCH] Rate limit reached. Stopping search.")
+                        return []
+                
+                # Handle service unavailable
+                if response.status_code == 503:
+                    delay = base_delay * (2 ** attempt)
+                    print(f"⚠️ [GOOGLE_SERVICE_UNAVAILABLE] Query {i}, attempt {attempt + 1}: Service unavailable, waiting {delay}s")
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(delay)
+                        continue
+                    else:
+                        print(f"❌ [WEB_RESEARCH] Service unavailable. Stopping search.")
+                        return []
+                
+                response.raise_for_status()
+                return response.json().get('items', [])
+                
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in [429, 503] and attempt < max_retries - 1:
+                    delay = base_delay * (2 ** attempt)
+                    print(f"⚠️ [GOOGLE_HTTP_ERROR] Query {i}, attempt {attempt + 1}: {e.response.status_code}, waiting {delay}s")
+                    await asyncio.sleep(delay)
+                    continue
+                else:
+                    print(f"⚠️ [WEB_RESEARCH] HTTP error for query {i}: {e}")
+                    return []
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    delay = base_delay * (2 ** attempt)
+                    print(f"⚠️ [GOOGLE_ERROR] Query {i}, attempt {attempt + 1}: {e}, waiting {delay}s")
+                    await asyncio.sleep(delay)
+                    continue
+                else:
+                    print(f"⚠️ [WEB_RESEARCH] Error for query {i}: {e}")
+                    traceback.print_exc()
+                    return []
+        return []
+
     def _is_charity_relevant(self, title: str, snippet: str) -> bool:
         """
         Проверяет релевантность результата поиска для благотворительной деятельности.
@@ -1021,28 +1069,9 @@ class GeminiService:
         """
         combined_text = f"{title} {snippet}".lower()
         
-        # Расширенные позитивные индикаторы благотворительности
-        positive_indicators = [
-            "благотворительность", "пожертвование", "спонсорство", "помощь", 
-            "поддержка", "фонд", "социальная ответственность", "CSR", "КСО",
-            "детский дом", "больница", "образование", "стипендия",
-            "волонтер", "донор", "меценат", "гранты", "социальный проект",
-            "корпоративная социальная ответственность", "экология", "культура",
-            "спорт", "медицина", "университет", "школа", "детский сад",
-            "инвалиды", "малообеспеченные", "пенсионеры", "ветераны"
-        ]
-        
-        # Негативные индикаторы (спам, реклама, не благотворительность)
-        negative_indicators = [
-            "купить", "скидка", "цена", "товар", "услуга", "продажа",
-            "реклама", "заказать", "доставка", "магазин", "каталог",
-            "вакансия", "работа", "резюме", "сотрудник", "зарплата",
-            "отзыв", "жалоба", "скандал", "коррупция", "штраф"
-        ]
-        
         # Подсчитываем релевантность с более гибкими критериями
-        positive_score = sum(1 for indicator in positive_indicators if indicator in combined_text)
-        negative_score = sum(1 for indicator in negative_indicators if indicator in combined_text)
+        positive_score = sum(1 for indicator in CHARITY_POSITIVE_INDICATORS if indicator in combined_text)
+        negative_score = sum(1 for indicator in CHARITY_NEGATIVE_INDICATORS if indicator in combined_text)
         
         # Более гибкие критерии: результат релевантен, если есть позитивные индикаторы
         # и негативных не больше чем позитивных + 1 (допускаем небольшой шум)
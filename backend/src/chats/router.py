@@ -1,5 +1,6 @@
 # backend/src/chats/router.py
 
+import asyncio
 import uuid
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -10,6 +11,7 @@ from ..core.database import get_db
 from ..auth.dependencies import get_current_user
 from ..auth.models import User
 from . import service as chat_service, schemas
+from ..ai_conversation.assistant_creator import wait_for_chat_message_writes
 
 # Pydantic model for the incoming request to save/update a chat summary
 class ChatHistorySaveRequest(BaseModel):
@@ -64,13 +66,15 @@ def save_chat_history_summary(
 
 
 @router.get("/{chat_id}", response_model=schemas.ChatHistoryResponseSchema)
-def get_single_chat_history(
+async def get_single_chat_history(
     chat_id: uuid.UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get the full message history for a specific chat."""
-    chat = chat_service.get_chat_history(db=db, chat_id=chat_id, user=current_user)
+    # The chat's latest assistant reply is stored in the background, so include it
+    await wait_for_chat_message_writes(chat_id)
+    chat = await asyncio.to_thread(chat_service.get_chat_history, db=db, chat_id=chat_id, user=current_user)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found or you don't have permission.")
     return chat
@@ -1,6 +1,10 @@
 # backend/src/chats/service.py
 
+import logging
+import re
+import threading
 import uuid
+from collections import OrderedDict
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -8,6 +12,30 @@ from datetime import datetime
 from . import models
 from ..auth.models import User # Your User model
 
+logger = logging.getLogger(__name__)
+
+# Keywords that mark a user message as a company search request. Compiled into one
+# case-insensitive pattern so each message is scanned once instead of lowercased and
+# searched once per keyword. Plain substrings on purpose: 'компани' must match every
+# inflection ('компании', 'компаний', ...).
+SEARCH_REQUEST_KEYWORDS = ['найди', 'find', 'поиск', 'search', 'компани', 'company', 'еще', 'more', 'дополнительно', 'additional']
+_SEARCH_REQUEST_PATTERN = re.compile("|".join(map(re.escape, SEARCH_REQUEST_KEYWORDS)), re.IGNORECASE)
+
+# Number of search requests per chat (see count_search_requests), counted from the
+# database once and then kept up to date as user messages are created here
+_SEARCH_REQUEST_COUNTS: "OrderedDict[uuid.UUID, int]" = OrderedDict()
+_SEARCH_REQUEST_COUNTS_LOCK = threading.Lock()
+_SEARCH_REQUEST_COUNTS_MAX_CHATS = 4096
+
+
+def _count_new_user_message(chat_id: uuid.UUID, content: str) -> None:
+    """Updates the cached search request count of a chat for a new user message."""
+    if not _SEARCH_REQUEST_PATTERN.search(content):
+        return
+    with _SEARCH_REQUEST_COUNTS_LOCK:
+        if chat_id in _SEARCH_REQUEST_COUNTS:
+            _SEARCH_REQUEST_COUNTS[chat_id] += 1
+
 def get_chats_for_user(db: Session, user: User) -> List[models.Chat]:
     """Fetches all chat sessions for a specific user, ordered by most recent."""
     return db.query(models.Chat).filter(models.Chat.user_id == user.id).order_by(models.Chat.updated_at.desc()).all()
@@ -90,6 +118,8 @@ def delete_chat_from_db(db: Session, chat_id: uuid.UUID, user_id: uuid.UUID):
 
     db.delete(chat_to_delete)
     db.commit()
+    with _SEARCH_REQUEST_COUNTS_LOCK:
+        _SEARCH_REQUEST_COUNTS.pop(chat_id, None)
 
 
 # --- Functions needed by assistant_creator.py ---
@@ -120,7 +150,7 @@ def create_chat(
     db.add(db_chat)
     db.commit()
     db.refresh(db_chat)
-    print(f"✅ Created new chat in DB: {db_chat.id} with title: '{db_chat.title}'")
+    logger.info("Created new chat in DB: %s with title: %r", db_chat.id, db_chat.title)
     return db_chat
 
 def update_chat_openai_ids(
@@ -139,7 +169,7 @@ def update_chat_openai_ids(
         db_chat.updated_at = datetime.now() # Ensure updated_at is updated, use datetime.now() for timezone-aware
         db.commit()
         db.refresh(db_chat)
-        print(f"✅ Updated chat {chat_id} with new OpenAI IDs")
+        logger.info("Updated chat %s with new OpenAI IDs", chat_id)
     return db_chat
 
 def create_message(
@@ -161,7 +191,9 @@ def create_message(
     db.add(db_message)
     db.commit()
     db.refresh(db_message)
-    print(f"✅ Created new message in DB for chat {chat_id} (role: {role})")
+    if role == "user":
+        _count_new_user_message(chat_id, content)
+    logger.debug("Created new message in DB for chat %s (role: %s)", chat_id, role)
     return db_message
 
 # --- Existing function (can coexist or be refactored) ---
@@ -214,6 +246,7 @@ def save_conversation_turn(
     db.add_all([user_message, ai_message])
     db.commit()
     db.refresh(chat)
+    _count_new_user_message(chat.id, user_message_content)
     
     return chat
 
@@ -221,24 +254,36 @@ def count_search_requests(db: Session, chat_id: uuid.UUID) -> int:
     """
     Count the number of previous search requests in a chat session.
     This helps with pagination by determining the offset for "more" requests.
+    The count is read from the database once per chat; afterwards the cached value,
+    updated by create_message, is returned.
     """
-    # Count user messages that contain search-related keywords
-    search_keywords = ['найди', 'find', 'поиск', 'search', 'компани', 'company', 'еще', 'more', 'дополнительно', 'additional']
-    
-    user_messages = db.query(models.Message).filter(
+    with _SEARCH_REQUEST_COUNTS_LOCK:
+        cached_count = _SEARCH_REQUEST_COUNTS.get(chat_id)
+        if cached_count is not None:
+            _SEARCH_REQUEST_COUNTS.move_to_end(chat_id)
+            return cached_count
+
+    # Count user messages that contain search-related keywords. Only the content
+    # column is loaded, the rest of the message rows is not needed here.
+    user_messages = db.query(models.Message.content).filter(
         models.Message.chat_id == chat_id,
         models.Message.role == "user"
     ).order_by(models.Message.created_at.asc()).all()
     
     search_count = 0
-    for message in user_messages:
-        content_lower = message.content.lower()
+    for (content,) in user_messages:
         # Check if this message contains search keywords
-        if any(keyword in content_lower for keyword in search_keywords):
+        if _SEARCH_REQUEST_PATTERN.search(content):
             search_count += 1
-            print(f"[count_search_requests] Found search request #{search_count}: '{message.content[:50]}...'")
+            logger.debug("[count_search_requests] Found search request #%d: %.50r", search_count, content)
     
-    print(f"[count_search_requests] Total search requests in chat {chat_id}: {search_count}")
+    logger.debug("[count_search_requests] Total search requests in chat %s: %d", chat_id, search_count)
+    with _SEARCH_REQUEST_COUNTS_LOCK:
+        # Keep an entry stored by a concurrent call, it may already count newer messages
+        search_count = _SEARCH_REQUEST_COUNTS.setdefault(chat_id, search_count)
+        _SEARCH_REQUEST_COUNTS.move_to_end(chat_id)
+        while len(_SEARCH_REQUEST_COUNTS) > _SEARCH_REQUEST_COUNTS_MAX_CHATS:
+            _SEARCH_REQUEST_COUNTS.popitem(last=False)
     return search_count
 
 def get_last_user_message(db: Session, chat_id: uuid.UUID) -> Optional[str]:
@@ -252,8 +297,8 @@ def get_last_user_message(db: Session, chat_id: uuid.UUID) -> Optional[str]:
     ).order_by(models.Message.created_at.desc()).first()
     
     if last_message:
-        print(f"[get_last_user_message] Last user message: '{last_message.content[:50]}...'")
+        logger.debug("[get_last_user_message] Last user message: %.50r", last_message.content)
         return last_message.content
     
-    print(f"[get_last_user_message] No user messages found in chat {chat_id}")
+    logger.debug("[get_last_user_message] No user messages found in chat %s", chat_id)
     return None
\ No newline at end of file
@@ -7,6 +7,7 @@ Business logic for company data retrieval and processing.
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, func, text
+from sqlalchemy.exc import DBAPIError
 from uuid import UUID
 import logging
 
@@ -21,13 +22,30 @@ class CompanyService:
     
     def __init__(self, db: Session):
         self.db = db
+
+    def _execute_with_reconnect(self, operation):
+        """
+        Run a DB operation, retrying once if its pooled connection dropped mid-query.
+
+        pool_pre_ping only validates connections on checkout; a connection that dies
+        while in use is invalidated by the pool, so a single retry gets a fresh one
+        instead of surfacing the error to the caller.
+        """
+        try:
+            return operation()
+        except DBAPIError as e:
+            if not e.connection_invalidated:
+                raise
+            logging.warning("[DB_SERVICE] Connection invalidated, retrying once: %s", e)
+            self.db.rollback()
+            return operation()
     
     def test_offset_functionality(self, location: str = "Алматы") -> Dict[str, Any]:
         """
         Test function to verify that offset is working correctly.
         This will run the same query with different offsets to see if we get different results.
         """
-        logging.info(f"[DB_SERVICE][TEST_OFFSET] Testing offset functionality for location: {location}")
+        logging.info("[DB_SERVICE][TEST_OFFSET] Testing offset functionality for location: %s", location)
         
         # Test with offset 0
         results_0 = self.search_companies(location=location, limit=5, offset=0)
@@ -41,16 +59,16 @@ class CompanyService:
         results_10 = self.search_companies(location=location, limit=5, offset=10)
         first_companies_10 = [r['name'] for r in results_10[:3]]
         
-        logging.info(f"[DB_SERVICE][TEST_OFFSET] Offset 0 results: {first_companies_0}")
-        logging.info(f"[DB_SERVICE][TEST_OFFSET] Offset 5 results: {first_companies_5}")
-        logging.info(f"[DB_SERVICE][TEST_OFFSET] Offset 10 results: {first_companies_10}")
+        logging.info("[DB_SERVICE][TEST_OFFSET] Offset 0 results: %s", first_companies_0)
+        logging.info("[DB_SERVICE][TEST_OFFSET] Offset 5 results: %s", first_companies_5)
+        logging.info("[DB_SERVICE][TEST_OFFSET] Offset 10 results: %s", first_companies_10)
         
         # Check if results are different
         offset_0_5_different = set(first_companies_0) != set(first_companies_5)
         offset_5_10_different = set(first_companies_5) != set(first_companies_10)
         
-        logging.info(f"[DB_SERVICE][TEST_OFFSET] Offset 0 vs 5 different: {offset_0_5_different}")
-        logging.info(f"[DB_SERVICE][TEST_OFFSET] Offset 5 vs 10 different: {offset_5_10_different}")
+        logging.info("[DB_SERVICE][TEST_OFFSET] Offset 0 vs 5 different: %s", offset_0_5_different)
+        logging.info("[DB_SERVICE][TEST_OFFSET] Offset 5 vs 10 different: %s", offset_5_10_different)
         
         return {
             "offset_0_results": first_companies_0,
@@ -67,13 +85,25 @@ class CompanyService:
         company_name: Optional[str] = None,
         activity_keywords: Optional[List[str]] = None,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        logging.info(f"[DB_SERVICE][SEARCH] location={location}, company_name={company_name}, activity_keywords={activity_keywords}, limit={limit}, offset={offset}")
+        """
+        Search companies ordered by locality, 2025 tax payments (highest first) and name.
+
+        `after` is an optional keyset cursor: the last row of the previous page (see
+        `search_cursor`). When given, the page starts right after that row instead of
+        skipping `offset` rows, so deep pages don't make Postgres scan and discard
+        every earlier row. The ORM fallback honours it the same way.
+        """
+        logging.info("[DB_SERVICE][SEARCH] location=%s, company_name=%s, activity_keywords=%s, limit=%s, offset=%s, keyset=%s", location, company_name, activity_keywords, limit, offset, after is not None)
         
-        # Optimized query construction - only select needed columns for better performance
+        # Optimized query construction - only select needed columns for better performance.
+        # The columns are aliased to the result dict keys, so rows map to dicts directly.
         query_parts = [
-            "SELECT id, \"Company\", \"BIN\", \"Activity\", \"Locality\", \"OKED\", \"Size\", \"KATO\", \"KRP\", tax_data_2023, tax_data_2024, tax_data_2025, website, contacts",
+            "SELECT id::text AS id, \"Company\" AS name, \"BIN\" AS bin, \"Activity\" AS activity, "
+            "\"Locality\" AS locality, \"OKED\" AS oked, \"Size\" AS size, \"KATO\" AS kato, \"KRP\" AS krp, "
+            "tax_data_2023, tax_data_2024, tax_data_2025, contacts, website",
             "FROM companies WHERE 1=1"
         ]
         params = {}
@@ -87,9 +117,9 @@ class CompanyService:
                 param_count += 1
                 query_parts.append(f"AND \"Locality\" ILIKE :loc_{param_count}")
                 params[f"loc_{param_count}"] = f"%{translated_location}%"
-                logging.info(f"[DB_SERVICE][SEARCH] Added location filter: Locality ILIKE '%{translated_location}%'")
+                logging.info("[DB_SERVICE][SEARCH] Added location filter: Locality ILIKE '%%%s%%'", translated_location)
             else:
-                logging.warning(f"[DB_SERVICE][SEARCH] Location '{location}' translated to 'null', skipping location filter")
+                logging.warning("[DB_SERVICE][SEARCH] Location '%s' translated to 'null', skipping location filter", location)
 
         # 2. Add company name filter if provided (optimized for single word vs multi-word)
         if company_name:
@@ -98,13 +128,13 @@ class CompanyService:
                 param_count += 1
                 query_parts.append(f"AND to_tsvector('russian', \"Company\") @@ plainto_tsquery('russian', :name_{param_count})")
                 params[f"name_{param_count}"] = company_name
-                logging.info(f"[DB_SERVICE][SEARCH] Added full-text name filter for: {company_name}")
+                logging.info("[DB_SERVICE][SEARCH] Added full-text name filter for: %s", company_name)
             else:
                 # Use ILIKE for single word queries (faster for simple patterns)
                 param_count += 1
                 query_parts.append(f"AND \"Company\" ILIKE :name_{param_count}")
                 params[f"name_{param_count}"] = f"%{company_name}%"
-                logging.info(f"[DB_SERVICE][SEARCH] Added ILIKE name filter: Company ILIKE '%{company_name}%'")
+                logging.info("[DB_SERVICE][SEARCH] Added ILIKE name filter: Company ILIKE '%%%s%%'", company_name)
 
         # 3. Add activity filter if provided (optimized full-text search)
         if activity_keywords and len(activity_keywords) > 0:
@@ -113,7 +143,7 @@ class CompanyService:
                 param_count += 1
                 query_parts.append(f"AND \"Activity\" ILIKE :act_{param_count}")
                 params[f"act_{param_count}"] = f"%{activity_keywords[0]}%"
-                logging.info(f"[DB_SERVICE][SEARCH] Added ILIKE activity filter: Activity ILIKE '%{activity_keywords[0]}%'")
+                logging.info("[DB_SERVICE][SEARCH] Added ILIKE activity filter: Activity ILIKE '%%%s%%'", activity_keywords[0])
             else:
                 # Multiple keywords - use full-text search
                 activity_conditions = []
@@ -122,74 +152,115 @@ class CompanyService:
                     activity_conditions.append(f"to_tsvector('russian', \"Activity\") @@ plainto_tsquery('russian', :act_{param_count})")
                     params[f"act_{param_count}"] = keyword
                 query_parts.append(f"AND ({' OR '.join(activity_conditions)})")
-                logging.info(f"[DB_SERVICE][SEARCH] Added full-text activity filters for keywords: {activity_keywords}")
-
-        # 4. Optimized ORDER BY - use indexed columns first, then expensive operations
-        # Start with indexed columns for better performance
-        query_parts.append("ORDER BY \"Locality\" ASC, COALESCE(tax_data_2025, 0) DESC, \"Company\" ASC")
-        logging.info(f"[DB_SERVICE][SEARCH] Applied optimized ORDER BY")
-
-        # 6. Add pagination - ALWAYS use both LIMIT and OFFSET
-        query_parts.append("LIMIT :limit OFFSET :offset")
-        params["limit"] = limit
-        params["offset"] = offset
-        logging.info(f"[DB_SERVICE][SEARCH] Applied LIMIT {limit} OFFSET {offset}")
+                logging.info("[DB_SERVICE][SEARCH] Added full-text activity filters for keywords: %s", activity_keywords)
+
+        # 4. Keyset pagination: continue right after the last row of the previous page
+        if after:
+            keyset_condition, keyset_params = self._keyset_condition(after)
+            query_parts.append(f"AND {keyset_condition}")
+            params.update(keyset_params)
+            logging.info("[DB_SERVICE][SEARCH] Added keyset condition after id=%s", after.get('id'))
+
+        # 5. Optimized ORDER BY - use indexed columns first, then expensive operations
+        # Start with indexed columns for better performance. id makes the order total,
+        # which keyset pagination (and stable OFFSET pages) rely on.
+        query_parts.append("ORDER BY \"Locality\" ASC, COALESCE(tax_data_2025, 0) DESC, \"Company\" ASC, id ASC")
+        logging.info("[DB_SERVICE][SEARCH] Applied optimized ORDER BY")
+
+        # 6. Add pagination - LIMIT plus either the keyset condition or OFFSET
+        if after:
+            query_parts.append("LIMIT :limit")
+            params["limit"] = limit
+            logging.info("[DB_SERVICE][SEARCH] Applied LIMIT %s (keyset)", limit)
+        else:
+            query_parts.append("LIMIT :limit OFFSET :offset")
+            params["limit"] = limit
+            params["offset"] = offset
+            logging.info("[DB_SERVICE][SEARCH] Applied LIMIT %s OFFSET %s", limit, offset)
         
         # Execute the optimized query
         final_query = " ".join(query_parts)
-        logging.info(f"[DB_SERVICE][SEARCH] Final query: {final_query}")
-        logging.info(f"[DB_SERVICE][SEARCH] Parameters: {params}")
+        logging.info("[DB_SERVICE][SEARCH] Final query: %s", final_query)
+        logging.info("[DB_SERVICE][SEARCH] Parameters: %s", params)
         
         try:
             # Ensure we start with a clean transaction state
             self.db.rollback()
             
             # Execute the main query directly - no need for test query
-            result = self.db.execute(text(final_query), params)
-            results = result.fetchall()
-            logging.info(f"[DB_SERVICE][SEARCH] Query executed, returned {len(results)} results")
+            results = self._execute_with_reconnect(
+                lambda: self.db.execute(text(final_query), params).fetchall()
+            )
+            logging.info("[DB_SERVICE][SEARCH] Query executed, returned %s results", len(results))
             
-            # Convert results to dictionaries efficiently
-            converted_results = []
-            for row in results:
-                company_dict = {
-                    # --- ИСПРАВЛЕНИЕ ---
-                    "id": str(row.id) if row.id is not None else None,
-                    "name": row.Company,
-                    "bin": str(row.BIN) if row.BIN is not None else None,
-                    # -----------------
-                    "activity": row.Activity,
-                    "locality": row.Locality,
-                    "oked": row.OKED,
-                    "size": row.Size,
-                    "kato": row.KATO,
-                    "krp": row.KRP,
-                    "tax_data_2023": row.tax_data_2023,
-                    "tax_data_2024": row.tax_data_2024,
-                    "tax_data_2025": row.tax_data_2025,
-                    "contacts": row.contacts,
-                    "website": row.website,
-                }
-                converted_results.append(company_dict)
+            # The SELECT list already has the dictionary keys (and id as text)
+            converted_results = [dict(row._mapping) for row in results]
             
             # Minimal debug logging for performance
             if converted_results:
-                logging.info(f"[DB_SERVICE][SEARCH] First result: {converted_results[0]['name']} (BIN: {converted_results[0]['bin']})")
+                logging.info("[DB_SERVICE][SEARCH] First result: %s (BIN: %s)", converted_results[0]['name'], converted_results[0]['bin'])
                 if len(converted_results) > 1:
-                    logging.info(f"[DB_SERVICE][SEARCH] Second result: {converted_results[1]['name']} (BIN: {converted_results[1]['bin']})")
+                    logging.info("[DB_SERVICE][SEARCH] Second result: %s (BIN: %s)", converted_results[1]['name'], converted_results[1]['bin'])
                 if len(converted_results) > 2:
-                    logging.info(f"[DB_SERVICE][SEARCH] Third result: {converted_results[2]['name']} (BIN: {converted_results[2]['bin']})")
+                    logging.info("[DB_SERVICE][SEARCH] Third result: %s (BIN: %s)", converted_results[2]['name'], converted_results[2]['bin'])
                 if len(converted_results) > 3:
-                    logging.info(f"[DB_SERVICE][SEARCH] ... and {len(converted_results) - 3} more")
+                    logging.info("[DB_SERVICE][SEARCH] ... and %s more", len(converted_results) - 3)
             else:
-                logging.warning(f"[DB_SERVICE][SEARCH] No results returned from database")
+                logging.warning("[DB_SERVICE][SEARCH] No results returned from database")
             
             return converted_results
             
         except Exception as e:
-            logging.error(f"[DB_SERVICE][SEARCH] Database error: {e}")
+            logging.error("[DB_SERVICE][SEARCH] Database error: %s", e)
             # Fallback to SQLAlchemy ORM if raw SQL fails
-            return self._fallback_search(location, company_name, activity_keywords, limit, offset)
+            return self._fallback_search(location, company_name, activity_keywords, limit, offset, after)
+
+    @staticmethod
+    def search_cursor(company: Dict[str, Any]) -> Dict[str, Any]:
+        """Keyset cursor for the row after `company` in search_companies order."""
+        return {
+            "locality": company.get("locality"),
+            "tax_data_2025": company.get("tax_data_2025") or 0,
+            "name": company.get("name"),
+            "id": company.get("id"),
+        }
+
+    @staticmethod
+    def _keyset_condition(after: Dict[str, Any]) -> tuple:
+        """
+        Builds the SQL condition "row comes after `after`" for the search order
+        ("Locality" ASC, COALESCE(tax_data_2025, 0) DESC, "Company" ASC, id ASC).
+        Postgres sorts NULLs last in ascending order, so a NULL locality or name sorts
+        after every value and only equals another NULL.
+        """
+        # (column expression, sort direction, cursor value, nullable)
+        keys = [
+            ('"Locality"', "asc", after.get("locality"), True),
+            ("COALESCE(tax_data_2025, 0)", "desc", after.get("tax_data_2025") or 0, False),
+            ('"Company"', "asc", after.get("name"), True),
+            ("id", "asc", after.get("id"), False),
+        ]
+        params: Dict[str, Any] = {}
+        alternatives = []
+        equal_prefix: List[str] = []
+        for i, (column, direction, value, nullable) in enumerate(keys):
+            param = f"after_{i}"
+            placeholder = f"CAST(:{param} AS uuid)" if column == "id" else f":{param}"
+            if value is None and nullable:
+                # Nothing sorts after NULL in this column, only ties continue
+                greater = None
+                equal = f"{column} IS NULL"
+            else:
+                params[param] = value
+                operator = ">" if direction == "asc" else "<"
+                greater = f"{column} {operator} {placeholder}"
+                if nullable:
+                    greater = f"({greater} OR {column} IS NULL)"
+                equal = f"{column} = {placeholder}"
+            if greater:
+                alternatives.append(" AND ".join(equal_prefix + [greater]))
+            equal_prefix.append(equal)
+        return "(" + " OR ".join(f"({alternative})" for alternative in alternatives) + ")", params
 
     def _fallback_search(
         self,
@@ -197,10 +268,11 @@ class CompanyService:
         company_name: Optional[str] = None,
         activity_keywords: Optional[List[str]] = None,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Fallback search using SQLAlchemy ORM if raw SQL fails"""
-        logging.info(f"[DB_SERVICE][FALLBACK] Using ORM fallback search")
+        logging.info("[DB_SERVICE][FALLBACK] Using ORM fallback search")
         
         try:
             # Ensure we start with a clean transaction state
@@ -221,7 +293,7 @@ class CompanyService:
                     location_filter = Company.locality.ilike(f"%{translated_location}%")
                     filters.append(location_filter)
                 else:
-                    logging.warning(f"[DB_SERVICE][FALLBACK] Location '{location}' translated to 'null', skipping location filter")
+                    logging.warning("[DB_SERVICE][FALLBACK] Location '%s' translated to 'null', skipping location filter", location)
 
             if company_name:
                 name_filter = Company.company_name.ilike(f"%{company_name}%")
@@ -239,15 +311,25 @@ class CompanyService:
                         activity_filters.append(Company.activity.ilike(f"%{keyword}%"))
                     filters.append(or_(*activity_filters))
 
+            # Same keyset cursor as the raw SQL search, so a page continues where the
+            # previous one ended whichever path served it
+            if after:
+                keyset_condition, keyset_params = self._keyset_condition(after)
+                filters.append(text(keyset_condition).bindparams(**keyset_params))
+
             if filters:
                 query = query.where(and_(*filters))
 
-            # Optimized ORDER BY - use indexed columns first
+            # Optimized ORDER BY - use indexed columns first, id makes the order total
             query = query.order_by(
                 Company.locality.asc(),
                 func.coalesce(Company.tax_data_2025, 0).desc().nullslast(), 
-                Company.company_name.asc()
-            ).offset(offset).limit(limit)
+                Company.company_name.asc(),
+                Company.id.asc()
+            )
+            if not after:
+                query = query.offset(offset)
+            query = query.limit(limit)
             
             result = self.db.execute(query)
             rows = result.fetchall()
@@ -278,7 +360,7 @@ class CompanyService:
             return converted_results
             
         except Exception as e:
-            logging.error(f"[DB_SERVICE][FALLBACK] Error in fallback search: {e}")
+            logging.error("[DB_SERVICE][FALLBACK] Error in fallback search: %s", e)
             # Return empty list if even fallback fails
             return []
 
@@ -288,7 +370,7 @@ class CompanyService:
         limit: int = 50,
         offset: int = 0
     ) -> List[Dict[str, Any]]:
-        logging.info(f"[DB_SERVICE][BY_LOCATION] location={location}, limit={limit}, offset={offset}")
+        logging.info("[DB_SERVICE][BY_LOCATION] location=%s, limit=%s, offset=%s", location, limit, offset)
         """
         Get companies by specific location
         
@@ -305,7 +387,7 @@ class CompanyService:
         
         # Check if translation returned "null"
         if translated_location == "null":
-            logging.warning(f"[DB_SERVICE][BY_LOCATION] Location '{location}' translated to 'null', returning empty list")
+            logging.warning("[DB_SERVICE][BY_LOCATION] Location '%s' translated to 'null', returning empty list", location)
             return []
         
         query = """
@@ -326,7 +408,7 @@ class CompanyService:
                 "offset": offset
             })
             companies = result.fetchall()
-            logging.info(f"[DB_SERVICE][BY_LOCATION] Query returned {len(companies)} companies")
+            logging.info("[DB_SERVICE][BY_LOCATION] Query returned %s companies", len(companies))
             
             result_dicts = []
             for row in companies:
@@ -353,13 +435,13 @@ class CompanyService:
             return result_dicts
             
         except Exception as e:
-            logging.error(f"[DB_SERVICE][BY_LOCATION] Error: {e}")
+            logging.error("[DB_SERVICE][BY_LOCATION] Error: %s", e)
             # Fallback to ORM
             try:
                 self.db.rollback()
                 # Check if translation returned "null" before using in ORM fallback
                 if translated_location == "null":
-                    logging.warning(f"[DB_SERVICE][BY_LOCATION] ORM fallback: Location '{location}' translated to 'null', returning empty list")
+                    logging.warning("[DB_SERVICE][BY_LOCATION] ORM fallback: Location '%s' translated to 'null', returning empty list", location)
                     return []
                     
                 query = self.db.query(Company).filter(
@@ -372,11 +454,11 @@ class CompanyService:
                 ).offset(offset).limit(limit).all()
                 return [self._company_to_dict(company) for company in companies]
             except Exception as orm_error:
-                logging.error(f"[DB_SERVICE][BY_LOCATION] ORM fallback also failed: {orm_error}")
+                logging.error("[DB_SERVICE][BY_LOCATION] ORM fallback also failed: %s", orm_error)
                 return []
 
     def get_company_by_id(self, company_id: str) -> Optional[Dict[str, Any]]:
-        logging.info(f"[DB_SERVICE][DETAILS] company_id={company_id}")
+        logging.info("[DB_SERVICE][DETAILS] company_id=%s", company_id)
         """
         Get company by ID
         
@@ -390,22 +472,53 @@ class CompanyService:
             # Ensure we start with a clean transaction state
             self.db.rollback()
             
-            company = self.db.query(Company).filter(
-                Company.bin_number == company_id
-            ).first()
+            company = self._execute_with_reconnect(
+                lambda: self.db.query(Company).filter(
+                    Company.bin_number == company_id
+                ).first()
+            )
             
             if company:
-                logging.info(f"[DB_SERVICE][DETAILS] Company found: {company.company_name} (BIN: {company.bin_number})")
+                logging.info("[DB_SERVICE][DETAILS] Company found: %s (BIN: %s)", company.company_name, company.bin_number)
                 return self._company_to_dict(company)
-            logging.warning(f"[DB_SERVICE][DETAILS] Company not found: {company_id}")
+            logging.warning("[DB_SERVICE][DETAILS] Company not found: %s", company_id)
             return None
             
         except Exception as e:
-            logging.error(f"[DB_SERVICE][DETAILS] Error: {e}")
+            logging.error("[DB_SERVICE][DETAILS] Error: %s", e)
             return None
 
+    def get_companies_by_ids(self, company_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get several companies by ID in one query (the bulk variant of get_company_by_id)
+
+        Args:
+            company_ids: Company BINs
+
+        Returns:
+            List of company dictionaries for the IDs that exist (in no particular order)
+        """
+        logging.info("[DB_SERVICE][DETAILS_BULK] company_ids=%s", company_ids)
+        if not company_ids:
+            return []
+        try:
+            # Ensure we start with a clean transaction state
+            self.db.rollback()
+
+            companies = self._execute_with_reconnect(
+                lambda: self.db.query(Company).filter(
+                    Company.bin_number.in_(company_ids)
+                ).all()
+            )
+            logging.info("[DB_SERVICE][DETAILS_BULK] Found %s of %s companies", len(companies), len(company_ids))
+            return [self._company_to_dict(company) for company in companies]
+
+        except Exception as e:
+            logging.error("[DB_SERVICE][DETAILS_BULK] Error: %s", e)
+            return []
+
     def get_all_locations(self) -> List[Dict[str, Any]]:
-        logging.info(f"[DB_SERVICE][LOCATIONS] Getting all locations with company counts")
+        logging.info("[DB_SERVICE][LOCATIONS] Getting all locations with company counts")
         """
         Get all unique locations with company counts
         
@@ -422,7 +535,7 @@ class CompanyService:
             ).group_by(Company.locality).order_by(
                 func.count(Company.bin_number).desc()
             ).all()
-            logging.info(f"[DB_SERVICE][LOCATIONS] Query returned {len(result)} locations")
+            logging.info("[DB_SERVICE][LOCATIONS] Query returned %s locations", len(result))
             return [
                 {
                     'location': row.locality,
@@ -431,7 +544,7 @@ class CompanyService:
                 for row in result
             ]
         except Exception as e:
-            logging.error(f"[DB_SERVICE][LOCATIONS] Error: {e}")
+            logging.error("[DB_SERVICE][LOCATIONS] Error: %s", e)
             return []
 
     def get_companies_by_region_keywords(
@@ -503,7 +616,7 @@ class CompanyService:
             return converted_results
             
         except Exception as e:
-            logging.error(f"[DB_SERVICE][REGION_KEYWORDS] Error: {e}")
+            logging.error("[DB_SERVICE][REGION_KEYWORDS] Error: %s", e)
             return []
 
     def _company_to_dict(self, company: Company) -> Dict[str, Any]:
@@ -534,7 +647,7 @@ class CompanyService:
             self.db.rollback()
             return self.db.query(Company).count()
         except Exception as e:
-            logging.error(f"[DB_SERVICE][COUNT] Error: {e}")
+            logging.error("[DB_SERVICE][COUNT] Error: %s", e)
             return 0 
 
     def get_total_company_count_by_location(self, location: str) -> int:
@@ -546,14 +659,14 @@ class CompanyService:
             
             # Check if translation returned "null"
             if translated_location == "null":
-                logging.warning(f"[DB_SERVICE][COUNT_BY_LOCATION] Location '{location}' translated to 'null', returning 0")
+                logging.warning("[DB_SERVICE][COUNT_BY_LOCATION] Location '%s' translated to 'null', returning 0", location)
                 return 0
 
             return self.db.query(Company).filter(
                 Company.locality.ilike(f"%{translated_location}%")
             ).count()
         except Exception as e:
-            logging.error(f"[DB_SERVICE][COUNT_BY_LOCATION] Error: {e}")
+            logging.error("[DB_SERVICE][COUNT_BY_LOCATION] Error: %s", e)
             return 0
 
  
\ No newline at end of file
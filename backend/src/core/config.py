@@ -94,6 +94,25 @@ class Settings(BaseSettings):
     # ------------------------------------------------------------------
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL_NAME: str = "gpt-4-turbo"  # Default model
+    # Upper bound (seconds) for one assistant run including its tool calls;
+    # stuck runs are cancelled after this
+    OPENAI_RUN_TIMEOUT_SECONDS: float = 90
+    # Semantic cache for the opening question of a chat: a new chat whose first
+    # message is at least this similar (cosine) to a cached one of the same user,
+    # location and search terms reuses its answer. Costs an embeddings request per
+    # new chat when enabled.
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_TTL_SECONDS: int = 3600
+    # Deployment name on Azure. Vectors are shortened only for names containing
+    # "text-embedding-3"; other models (or deployments) are used at their full size.
+    OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Empty OpenAI threads each worker process keeps ready for new chats (0 = off)
+    WARM_THREAD_POOL_SIZE: int = 0
+    # SQLite file keeping the location service's model answers across restarts;
+    # empty means a file in the system temp directory, which survives a process
+    # restart but not a new container, so point it at a persistent volume in production
+    LOCATION_CACHE_PATH: str = ""
 
     # Azure OpenAI specific settings
     AZURE_OPENAI_KEY: Optional[str] = None
@@ -0,0 +1,44 @@
+"""
+Logging setup for the Ayala Foundation Backend
+
+Moves log output off the request path: records are put on an in-memory queue and
+written to the real handlers (stderr by default) by a background listener thread.
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_listener: Optional[QueueListener] = None
+
+
+def start_queue_logging() -> None:
+    """
+    Route the root logger through a queue. The handlers configured so far (e.g. by
+    logging.basicConfig) are moved behind a QueueListener, so logging calls in
+    request handlers only enqueue the record instead of doing console I/O.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    root = logging.getLogger()
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    _listener.start()
+
+
+def stop_queue_logging() -> None:
+    """Flush the queued records and stop the listener thread (on app shutdown)."""
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    root = logging.getLogger()
+    root.handlers = list(_listener.handlers)
+    _listener = None
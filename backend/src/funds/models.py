@@ -82,4 +82,30 @@ class FundProfile(Base):
     user = relationship("User", back_populates="fund_profile")
     
     def __repr__(self):
-        return f"<FundProfile(id={self.id}, fund_name='{self.fund_name}', user_id={self.user_id})>" 
\ No newline at end of file
+        return f"<FundProfile(id={self.id}, fund_name='{self.fund_name}', user_id={self.user_id})>" 
+
+class DiscoveryBatch(Base):
+    """Bulk sponsor-discovery job run through the OpenAI Batch API"""
+
+    __tablename__ = "discovery_batches"
+
+    # Primary key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Foreign key to user
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # OpenAI batch ID and its last known status (validating, in_progress, completed, ...)
+    batch_id = Column(String(255), nullable=False, unique=True)
+    status = Column(String(32), nullable=False)
+
+    # The submitted queries and, once the batch is done, the companies found per query
+    queries = Column(JSON, nullable=False)
+    results = Column(JSON)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DiscoveryBatch(id={self.id}, batch_id='{self.batch_id}', status='{self.status}')>"
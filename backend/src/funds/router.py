@@ -4,20 +4,25 @@ API Router for fund profile endpoints
 Provides endpoints for charity fund profile management.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
-from uuid import uuid4
+from uuid import UUID, uuid4
 
-from .models import FundProfile
-from .schemas import FundProfileCreate, FundProfileResponse
+from .models import DiscoveryBatch, FundProfile
+from .schemas import DiscoveryBatchCreate, DiscoveryBatchResponse, FundProfileCreate, FundProfileResponse
 # Import correct models from ai_conversation
 from ..ai_conversation.models import ChatRequest, ChatResponse
 from ..auth.router import get_current_user
 from ..auth.models import User
-from ..core.database import get_db
+from ..core.database import SessionLocal, get_db
 from ..ai_conversation.assistant_creator import handle_conversation_with_context
+from ..ai_conversation.batch_discovery import create_batch_discovery, refresh_batch_discovery
 
 
 # Create router
@@ -48,8 +53,9 @@ async def handle_chat(
     
     # The new `handle_conversation_with_context` will manage its own state.
     # We no longer need to manually load or save the history here.
-    
-    response_data = handle_conversation_with_context(
+    # The assistant turn is async (OpenAI calls are awaited, DB work runs in worker
+    # threads), so many turns can be in flight on the event loop at once.
+    response_data = await handle_conversation_with_context(
         user_input=request.user_input,
         db=db,
         user=current_user,
@@ -62,6 +68,98 @@ async def handle_chat(
     return ChatResponse(**response_data)
 
 
+# Reply deltas buffered per streamed turn; when the client reads slower than the model
+# writes, the turn waits for it instead of piling the reply up in memory
+STREAM_QUEUE_MAX_DELTAS = 256
+# How often a streamed turn with no new deltas checks that its client is still there
+STREAM_DISCONNECT_POLL_SECONDS = 5.0
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+@router.post("/chat/stream")
+async def handle_chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Same conversation turn as POST /funds/chat, streamed as server-sent events:
+    "delta" events carry the reply text as it is generated, the final "done" event
+    the full reply with the companies found (or an "error" event). When the client
+    disconnects the turn is cancelled, along with its run on OpenAI, and the user's
+    message stays stored without a reply.
+    """
+    if not request.user_input.strip():
+        raise HTTPException(status_code=400, detail="User input cannot be empty")
+
+    deltas: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=STREAM_QUEUE_MAX_DELTAS)
+
+    async def run_turn() -> Dict[str, Any]:
+        # The turn owns its session, the request's own dependencies may be gone
+        # before the stream ends. A cancelled turn only returns once its tool workers
+        # are done with the session.
+        db = SessionLocal()
+        cancelled = False
+        try:
+            return await handle_conversation_with_context(
+                user_input=request.user_input,
+                db=db,
+                user=current_user,
+                chat_id=request.chat_id,
+                assistant_id=request.assistant_id,
+                on_text_delta=deltas.put
+            )
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            db.close()
+            # After a disconnect nobody reads the queue, so the end marker could block
+            if not cancelled:
+                await deltas.put(None)
+
+    async def event_stream():
+        turn = asyncio.create_task(run_turn())
+        try:
+            while True:
+                try:
+                    text = await asyncio.wait_for(deltas.get(), STREAM_DISCONNECT_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    if await http_request.is_disconnected():
+                        print(f"Client of streamed chat turn for user {current_user.id} disconnected")
+                        return
+                    continue
+                if text is None:
+                    break
+                yield _sse_event("delta", {"text": text})
+
+            try:
+                response_data = await turn
+            except Exception as e:
+                print(f"Error in streamed chat turn for user {current_user.id}: {e}")
+                response_data = {"error": "An unexpected error occurred while processing your request."}
+            if "error" in response_data:
+                yield _sse_event("error", response_data)
+            else:
+                yield _sse_event("done", {
+                    "message": response_data.get("response"),
+                    "companies": response_data.get("companies_found", []),
+                    "chat_id": response_data.get("chat_id"),
+                    "assistant_id": response_data.get("assistant_id"),
+                    "openai_thread_id": response_data.get("thread_id"),
+                })
+        finally:
+            # Disconnected (or the stream was cancelled): stop the turn instead of
+            # letting it run the model and tools for nobody
+            if not turn.done():
+                turn.cancel()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get("/chat/history", response_model=List[Dict[str, Any]])
 async def get_chat_history(
     db: Session = Depends(get_db),
@@ -202,6 +300,57 @@ async def delete_fund_profile(
     
     return {"message": "Fund profile deleted successfully"}
 
+def _discovery_batch_response(discovery_batch: DiscoveryBatch) -> DiscoveryBatchResponse:
+    return DiscoveryBatchResponse(
+        id=str(discovery_batch.id),
+        batch_id=discovery_batch.batch_id,
+        status=discovery_batch.status,
+        queries=discovery_batch.queries,
+        results=discovery_batch.results,
+        created_at=discovery_batch.created_at.isoformat(),
+        updated_at=discovery_batch.updated_at.isoformat()
+    )
+
+
+@router.post("/discovery-batches", response_model=DiscoveryBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_discovery_batch(
+    batch_data: DiscoveryBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit many sponsor-discovery queries as one OpenAI Batch API job.
+    Results are available within 24 hours through GET /funds/discovery-batches/{id}.
+    """
+    queries = [query.strip() for query in batch_data.queries if query.strip()]
+    if not queries:
+        raise HTTPException(status_code=400, detail="At least one non-empty query is required")
+
+    discovery_batch = await create_batch_discovery(queries, db, current_user.id)
+    return _discovery_batch_response(discovery_batch)
+
+
+@router.get("/discovery-batches/{discovery_batch_id}", response_model=DiscoveryBatchResponse)
+async def get_discovery_batch(
+    discovery_batch_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a discovery job; its status is refreshed from OpenAI until the job has finished"""
+    discovery_batch = db.query(DiscoveryBatch).filter(
+        DiscoveryBatch.id == discovery_batch_id,
+        DiscoveryBatch.user_id == current_user.id
+    ).first()
+
+    if not discovery_batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Discovery batch not found"
+        )
+
+    discovery_batch = await refresh_batch_discovery(discovery_batch, db)
+    return _discovery_batch_response(discovery_batch)
+
 # The chat history save and delete endpoints have been moved to the chats router.
 # The related Pydantic models (ChatHistoryItem, ChatHistorySaveRequest)
 # and the endpoints save_chat_history_item and delete_chat_history_item
@@ -4,8 +4,8 @@ Pydantic schemas for fund profiles
 Request/Response models for fund profile endpoints.
 """
 
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Any, Dict, List, Optional
 
 
 class FundProfileBase(BaseModel):
@@ -27,4 +27,21 @@ class FundProfileResponse(FundProfileBase):
     updated_at: str
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+
+class DiscoveryBatchCreate(BaseModel):
+    """Schema for submitting a bulk sponsor-discovery job"""
+    queries: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class DiscoveryBatchResponse(BaseModel):
+    """Schema for bulk sponsor-discovery job response"""
+    id: str
+    batch_id: str
+    status: str
+    queries: List[str]
+    # Per query: the search criteria and the companies found, once the job is done
+    results: Optional[List[Dict[str, Any]]] = None
+    created_at: str
+    updated_at: str
@@ -18,6 +18,9 @@ from .ai_conversation.router import router as ai_router
 from .auth.router import router as auth_router # Пример
 from .companies.router import router as companies_router # Пример
 from .chats.router import router as chats_router # Пример
+from .ai_conversation.assistant_creator import delete_warm_threads, wait_for_pending_message_writes
+from .ai_conversation.openai_client import close_openai_client
+from .core.logging_config import start_queue_logging, stop_queue_logging
 
 app = FastAPI(
     title="Ayala API",
@@ -62,6 +65,8 @@ print("[INIT] All routers registered under /api/v1")
 @app.on_event("startup")
 def on_startup():
     print("🚀 [STARTUP] Ayala API is starting up...")
+    # Log records are written by a background thread, not by the request handlers
+    start_queue_logging()
     print("📋 [STARTUP] Endpoints:")
     print("   • POST /api/v1/ai/chat - AI Chat endpoint")
     print("   • POST /api/v1/ai/charity-research - Company Charity Research")
@@ -70,6 +75,17 @@ def on_startup():
     print("   • /api/v1/chats/* - Chat history endpoints")
     print("✅ [STARTUP] All routers and middleware initialized.")
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Let replies that are still being saved reach the database
+    await wait_for_pending_message_writes()
+    # Pre-created threads no chat has used would otherwise stay on OpenAI's side
+    await delete_warm_threads()
+    # Release the pooled connections of the shared OpenAI client
+    await close_openai_client()
+    print("👋 [SHUTDOWN] OpenAI client closed.")
+    stop_queue_logging()
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     print(f"➡️  [REQUEST] {request.method} {request.url.path}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test that keyset pagination returns the same pages as OFFSET pagination
+
+Needs a PostgreSQL database (DATABASE_URL). The rows live in a temporary
+"companies" table, which shadows the real one for this connection only, so no
+data in the database is read or changed.
+"""
+
+import sys
+import os
+import uuid
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.core.database import engine
+from src.companies.service import CompanyService
+
+PAGE_SIZE = 4
+
+# (locality, tax_data_2025, company name): NULL localities, tied and NULL taxes
+# (NULL sorts like 0) and rows tied on every sort key except id
+TEST_ROWS = [
+    ("Алматы", 500, "Альфа"),
+    ("Алматы", 500, "Альфа"),
+    ("Алматы", 500, "Бета"),
+    ("Алматы", 300, "Гамма"),
+    ("Алматы", None, "Дельта"),
+    ("Алматы", 0, "Дельта"),
+    ("Астана", 900, "Епсилон"),
+    ("Астана", 900, "Епсилон"),
+    (None, 700, "Зета"),
+    (None, 700, "Зета"),
+    (None, 100, "Эта"),
+    (None, None, "Тета"),
+    (None, 0, "Йота"),
+    (None, 0, "Йота"),
+]
+
+
+def _create_test_table(connection) -> None:
+    connection.execute(text(
+        "CREATE TEMP TABLE companies ("
+        "id uuid PRIMARY KEY, \"BIN\" varchar(12), \"Company\" varchar(255) NOT NULL, "
+        "\"OKED\" varchar(50), \"Activity\" varchar(255), \"KATO\" varchar(50), "
+        "\"Locality\" varchar(100), \"KRP\" varchar(50), \"Size\" varchar(50), "
+        "tax_data_2023 bigint, tax_data_2024 bigint, tax_data_2025 bigint, "
+        "website varchar(255), contacts text)"
+    ))
+    for locality, tax, name in TEST_ROWS:
+        connection.execute(
+            text("INSERT INTO companies (id, \"Company\", \"Locality\", tax_data_2025) VALUES (:id, :name, :locality, :tax)"),
+            {"id": str(uuid.uuid4()), "name": name, "locality": locality, "tax": tax},
+        )
+
+
+def _pages(search, pages: int):
+    """Returns (OFFSET pages, keyset pages) of one search function."""
+    offset_pages = [search(limit=PAGE_SIZE, offset=page * PAGE_SIZE) for page in range(pages)]
+    keyset_pages = [search(limit=PAGE_SIZE, offset=0)]
+    for page in range(1, pages):
+        cursor = CompanyService.search_cursor(keyset_pages[-1][-1])
+        keyset_pages.append(search(limit=PAGE_SIZE, offset=page * PAGE_SIZE, after=cursor))
+    return offset_pages, keyset_pages
+
+
+def test_keyset_pagination():
+    """Pages 1-3 (and the last, partial page) via keyset match OFFSET"""
+
+    print("🧪 Testing keyset pagination against OFFSET...")
+    print("=" * 70)
+
+    # One connection for the whole test, so the temporary table stays visible
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        _create_test_table(connection)
+        service = CompanyService(Session(bind=connection))
+
+        pages = -(-len(TEST_ROWS) // PAGE_SIZE)
+        success = True
+        for label, search in (("SQL search", service.search_companies), ("ORM fallback", service._fallback_search)):
+            offset_pages, keyset_pages = _pages(search, pages)
+            for page, (offset_page, keyset_page) in enumerate(zip(offset_pages, keyset_pages), 1):
+                offset_ids = [company["id"] for company in offset_page]
+                keyset_ids = [company["id"] for company in keyset_page]
+                if offset_ids == keyset_ids and offset_ids:
+                    print(f"✅ {label}, page {page}: {len(keyset_ids)} companies match")
+                else:
+                    print(f"❌ {label}, page {page}: OFFSET {offset_ids} != keyset {keyset_ids}")
+                    success = False
+            all_ids = [company["id"] for page in keyset_pages for company in page]
+            if len(all_ids) != len(TEST_ROWS) or len(set(all_ids)) != len(TEST_ROWS):
+                print(f"❌ {label}: keyset pages returned {len(all_ids)} rows ({len(set(all_ids))} distinct), expected {len(TEST_ROWS)}")
+                success = False
+
+    print("\n" + "=" * 70)
+    if success:
+        print("🎉 Keyset pages match OFFSET pages")
+    else:
+        print("⚠️ Keyset pagination differs from OFFSET pagination")
+    return success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_keyset_pagination() else 1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test the concurrent execution of the assistant's tool calls
+
+The tool handlers are stubbed, so neither OpenAI nor the companies database is
+used; the settings (DATABASE_URL, SECRET_KEY) still have to be set to import the
+assistant module.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.ai_conversation import assistant_creator
+from src.ai_conversation.assistant_creator import CharityFundAssistant
+
+
+def _tool_call(call_id: str, name: str, arguments: str = "{}"):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def _batch_ids(batches):
+    return [[tool_call.id for tool_call in batch] for batch in batches]
+
+
+def test_schedule_tool_calls():
+    """Batches of tool calls that may run together"""
+
+    print("🧪 Testing _schedule_tool_calls...")
+    print("=" * 70)
+
+    test_cases = [
+        (
+            "Reads of one resource share a batch",
+            [_tool_call("a", "search_companies"), _tool_call("b", "get_company_details"), _tool_call("c", "get_company_details_bulk")],
+            [["a", "b", "c"]],
+        ),
+        (
+            "An unknown tool writes its own resource",
+            [_tool_call("a", "search_companies"), _tool_call("b", "save_note"), _tool_call("c", "save_note"), _tool_call("d", "search_companies")],
+            [["a", "b"], ["c", "d"]],
+        ),
+        (
+            "A write is serialized with the reads around it",
+            [_tool_call("a", "search_companies"), _tool_call("b", "update_company"), _tool_call("c", "get_company_details")],
+            [["a"], ["b"], ["c"]],
+        ),
+        (
+            "No tool calls, no batches",
+            [],
+            [],
+        ),
+    ]
+
+    success = True
+    assistant_creator.TOOL_DEPENDS["update_company"] = ("write", "companies")
+    try:
+        for description, tool_calls, expected in test_cases:
+            batches = _batch_ids(CharityFundAssistant._schedule_tool_calls(tool_calls))
+            if batches == expected:
+                print(f"✅ {description}: {batches}")
+            else:
+                print(f"❌ {description}: {batches}, expected {expected}")
+                success = False
+    finally:
+        del assistant_creator.TOOL_DEPENDS["update_company"]
+    return success
+
+
+def test_run_tool_calls_concurrently():
+    """Outputs keep the order of the tool calls and a failing call is isolated"""
+
+    print("\n🧪 Testing _run_tool_calls_concurrently...")
+    print("=" * 70)
+
+    # No OpenAI client is needed, only the tool handling
+    assistant = CharityFundAssistant.__new__(CharityFundAssistant)
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def handle_tool_call(tool_call, company_service, chat_id=None, details_cache=None):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        try:
+            # Earlier calls finish later, so completion order differs from call order
+            time.sleep(float(tool_call.function.arguments))
+            if tool_call.function.name == "broken_tool":
+                raise RuntimeError("handler exploded")
+            return {"tool_call_id": tool_call.id, "output": f"ok {tool_call.id}"}, [{"id": tool_call.id}]
+        finally:
+            with lock:
+                running -= 1
+
+    assistant._handle_tool_call = handle_tool_call
+    assistant._prefetch_company_details = lambda tool_calls, company_service, details_cache: None
+
+    tool_calls = [
+        _tool_call("call_1", "search_companies", "0.3"),
+        _tool_call("call_2", "broken_tool", "0.2"),
+        _tool_call("call_3", "get_company_details", "0.1"),
+        _tool_call("call_4", "get_company_details", "0.0"),
+    ]
+    db = Session(bind=create_engine("sqlite://"))
+    results = asyncio.run(assistant._run_tool_calls_concurrently(tool_calls, db))
+
+    success = True
+    output_ids = [output["tool_call_id"] for output, _ in results]
+    if output_ids == [tool_call.id for tool_call in tool_calls]:
+        print(f"✅ One output per call, in call order: {output_ids}")
+    else:
+        print(f"❌ Outputs out of order: {output_ids}")
+        success = False
+
+    failed_output, failed_companies = results[1]
+    if failed_output["output"].startswith("Error executing broken_tool") and failed_companies == []:
+        print(f"✅ The failing call got an error output: {failed_output['output']}")
+    else:
+        print(f"❌ Unexpected output for the failing call: {results[1]}")
+        success = False
+
+    others = [results[i] for i in (0, 2, 3)]
+    if all(output["output"] == f"ok {output['tool_call_id']}" and companies for output, companies in others):
+        print("✅ The other calls still returned their results")
+    else:
+        print(f"❌ The failing call affected the others: {others}")
+        success = False
+
+    # broken_tool counts as a write of its own resource, so it doesn't block the reads
+    if max_running > 1:
+        print(f"✅ Calls ran concurrently (up to {max_running} at once)")
+    else:
+        print("❌ Calls ran one at a time")
+        success = False
+    return success
+
+
+if __name__ == "__main__":
+    results = [test_schedule_tool_calls(), test_run_tool_calls_concurrently()]
+    print("\n" + "=" * 70)
+    if all(results):
+        print("🎉 ALL TOOL CALL TESTS PASSED!")
+    else:
+        print("⚠️ Some tool call tests failed")
+    sys.exit(0 if all(results) else 1)